@@ -1,6 +1,8 @@
 import requests
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -8,6 +10,7 @@ import logging
 
 from security import SecurityManager
 from config import Config
+from utils import json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +23,16 @@ class APIClient:
         self.session = self._create_session()
         self.last_request_time = 0
         self.rate_limit_delay = 0.1  # 100ms between requests
+        self._rate_limit_lock = threading.Lock()  # Requests may be issued from several threads
     
     def _create_session(self) -> requests.Session:
         """Create a requests session with retry logic."""
         session = requests.Session()
-        
+        self._mount_adapter(session)
+        return session
+    
+    def _mount_adapter(self, session: requests.Session, pool_connections: int = 10, pool_maxsize: int = 10):
+        """Mount a keep-alive connection pool with retry logic on the session."""
         # Configure retry strategy
         retry_strategy = Retry(
             total=3,
@@ -32,22 +40,30 @@ class APIClient:
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+    
+    def configure_pool(self, pool_connections: int = 10, pool_maxsize: int = 10):
+        """Resize the keep-alive connection pool.
         
-        return session
+        Concurrent callers beyond pool_maxsize would otherwise open throwaway
+        connections, each paying a fresh TCP+TLS handshake.
+        """
+        self._mount_adapter(self.session, pool_connections, pool_maxsize)
     
     def _rate_limit(self):
         """Implement rate limiting to avoid API restrictions."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.rate_limit_delay:
-            sleep_time = self.rate_limit_delay - time_since_last
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        with self._rate_limit_lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            
+            if time_since_last < self.rate_limit_delay:
+                sleep_time = self.rate_limit_delay - time_since_last
+                time.sleep(sleep_time)
+            
+            self.last_request_time = time.time()
     
     def _make_request(self, method: str, endpoint: str, params: Dict = None, 
                      data: Dict = None, requires_auth: bool = True) -> Dict:
@@ -78,7 +94,7 @@ class APIClient:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             response.raise_for_status()
-            response_data = response.json()
+            response_data = json_loads(response.content)
             
             # Validate response for security
             if not self.security_manager.validate_api_response(response_data):
@@ -193,6 +209,21 @@ class APIClient:
             logger.error(f"Failed to cancel order {order_id}: {e}")
             return False
     
+    def cancel_orders_batch(self, order_ids: List[str]) -> Dict[str, bool]:
+        """Cancel several orders at once.
+        
+        The exchange API has no batch-cancel endpoint, so the individual cancels are
+        issued concurrently; shutdown then takes about one round trip instead of one
+        per order. Returns whether each order was cancelled.
+        """
+        if not order_ids:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(32, len(order_ids))) as executor:
+            results = list(executor.map(self.cancel_order, order_ids))
+        
+        return dict(zip(order_ids, results))
+    
     def get_order_status(self, order_id: str) -> Dict:
         """Get status of a specific order."""
         try:
@@ -205,6 +236,27 @@ class APIClient:
             logger.error(f"Failed to get order status for {order_id}: {e}")
             raise
     
+    def get_orders_by_ids(self, order_ids: List[str]) -> List[Dict]:
+        """Fetch the current state of several orders at once.
+        
+        Like cancel_orders_batch, the lookups run concurrently because the exchange
+        API has no bulk status endpoint. Orders whose lookup fails are left out;
+        get_order_status has already logged them.
+        """
+        if not order_ids:
+            return []
+        
+        def fetch(order_id: str) -> Optional[Dict]:
+            try:
+                return self.get_order_status(order_id)
+            except Exception:
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(32, len(order_ids))) as executor:
+            results = list(executor.map(fetch, order_ids))
+        
+        return [order for order in results if order is not None]
+    
     def get_trade_history(self, trading_pair: str = None, limit: int = 100) -> List[Dict]:
         """Fetch trade history."""
         try:
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -41,6 +42,24 @@ class Config:
         else:
             return "https://explorer.solana.com/tx/{signature}"
     
+    # Jupiter API Endpoints (point at a dedicated/paid host for higher rate limits and lower latency)
+    JUPITER_QUOTE_URL = os.getenv('JUPITER_QUOTE_URL', 'https://quote-api.jup.ag/v6/quote')
+    JUPITER_SWAP_URL = os.getenv('JUPITER_SWAP_URL', 'https://quote-api.jup.ag/v6/swap')
+    
+    # Transaction Broadcasting (optional Helius endpoint with staked-node forwarding)
+    HELIUS_API_KEY = os.getenv('HELIUS_API_KEY', '')
+    
+    @property
+    def SEND_RPC_URL(self):
+        """Get the RPC URL used to broadcast transactions (Helius if configured)."""
+        if self.HELIUS_API_KEY:
+            cluster = 'devnet' if self.NETWORK == 'devnet' else 'mainnet'
+            return f"https://{cluster}.helius-rpc.com/?api-key={self.HELIUS_API_KEY}"
+        return self.RPC_URL
+    
+    # Skip RPC preflight simulation on send (lower latency, but errors only surface on confirmation)
+    SKIP_PREFLIGHT = os.getenv('SKIP_PREFLIGHT', 'False').lower() == 'true'
+    
     # Wallet Configuration (for DEX trading)
     WALLET_TYPE = os.getenv('WALLET_TYPE', 'software')  # 'software', 'ledger', 'trezor'
     PRIVATE_KEY = os.getenv('PRIVATE_KEY', '') if os.getenv('WALLET_TYPE', 'software') == 'software' else None
@@ -108,6 +127,7 @@ class Config:
     CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '60'))  # seconds
     RETRY_DELAY = int(os.getenv('RETRY_DELAY', '300'))  # seconds
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
+    PRICE_CACHE_TTL = float(os.getenv('PRICE_CACHE_TTL', '1.0'))  # seconds a fetched market price is reused
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -176,4 +196,15 @@ class Config:
             'market_analysis_cache_duration': cls.MARKET_ANALYSIS_CACHE_DURATION,
             'min_volume_strength': cls.MIN_VOLUME_STRENGTH,
             'min_depth_quality': cls.MIN_DEPTH_QUALITY
-        } 
\ No newline at end of file
+        }
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide Config instance.
+    
+    Scripts that build their config in several stages share this one instance.
+    Plain settings are class attributes read from the environment at import time;
+    env-backed properties such as RPC_URL, SEND_RPC_URL and CAPITAL still call
+    os.getenv on every access.
+    """
+    return Config()
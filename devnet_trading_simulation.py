@@ -243,7 +243,7 @@ class DevnetTradingSimulation:
         """Display current performance metrics."""
         print("\n📊 Performance Metrics:")
         
-        runtime = (time.time() - self.bot.session_start) / 3600  # hours
+        runtime = (time.monotonic_ns() - self.bot.session_start) / 3.6e12  # hours
         win_rate = (self.bot.successful_trades / max(self.bot.total_trades, 1)) * 100
         
         print(f"   Runtime: {runtime:.1f} hours")
@@ -1,18 +1,105 @@
+import re
 import requests
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from solana.rpc.api import Client
 from solders.transaction import VersionedTransaction
 from solders.pubkey import Pubkey as PublicKey
 from solana.rpc.commitment import Commitment
 import logging
 
+from config import Config
 from solana_wallet import SolanaWallet
+from utils import b64decode, json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+# Token mint addresses used on the hot quote/swap paths
+SOL_MINT = "So11111111111111111111111111111111111111112"
+USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+def _create_jupiter_session() -> requests.Session:
+    """Create a pooled keep-alive session for Jupiter API calls.
+    
+    Transient gateway errors are retried at the transport level; rate limits (429)
+    are left to the per-call retry loops, which back off for longer.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'User-Agent': 'SolanaGridBot/1.0'
+    })
+    return session
+
+# Shared by every Jupiter client so TCP/TLS connections are reused across calls
+JUPITER_SESSION = _create_jupiter_session()
+
+# Seconds between signature status polls while waiting for confirmation (~2.5 slots)
+CONFIRMATION_POLL_INTERVAL = 1.0
+
+# Runs network prefetches (e.g. blockhash) while a Jupiter request is in flight
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dex-prefetch")
+
+# Fixed fields of every Jupiter /swap request; per-call fields are filled into a copy
+SWAP_PAYLOAD_TEMPLATE = {
+    "quoteResponse": None,
+    "userPublicKey": None,
+    "wrapAndUnwrapSol": True,
+    "dynamicComputeUnitLimit": True,
+    # CRITICAL FIX: Force Jupiter to NOT use address table lookups for devnet compatibility
+    "useVersionedTransactions": False,  # Use legacy transactions without address tables
+    "asLegacyTransaction": True,        # Force legacy format for devnet compatibility
+    "prioritizationFeeLamports": 1000,
+    "useTokenLedger": False
+}
+
+# Base64 never contains quotes or escapes, so the field can be sliced out without a full parse
+_SWAP_TRANSACTION_RE = re.compile(rb'"swapTransaction"\s*:\s*"([A-Za-z0-9+/=]*)"')
+
+def extract_swap_transaction(body: bytes) -> Optional[str]:
+    """Pull swapTransaction out of a raw Jupiter /swap response body.
+    
+    Only the base64 transaction is needed on the send path, so the rest of the
+    response (route plan, fee details) is not parsed. Falls back to a full JSON
+    parse if the field is not found in the expected form.
+    """
+    match = _SWAP_TRANSACTION_RE.search(body)
+    if match:
+        return match.group(1).decode('ascii')
+    return json_loads(body).get('swapTransaction')
+
+def is_versioned_transaction(transaction_bytes: bytes) -> bool:
+    """Check whether serialized transaction bytes hold a versioned (v0+) message.
+    
+    The wire format is a compact-u16 signature count, the 64-byte signatures, then
+    the message. Versioned messages start with a byte that has the 0x80 bit set;
+    a legacy message starts with its required-signature count, which never does.
+    """
+    num_signatures = 0
+    offset = 0
+    for shift in (0, 7, 14):
+        byte = transaction_bytes[offset]
+        offset += 1
+        num_signatures |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            break
+    message_offset = offset + 64 * num_signatures
+    return bool(transaction_bytes[message_offset] & 0x80)
+
 @dataclass
 class DEXToken:
     """Represents a token on a DEX."""
@@ -49,12 +136,9 @@ class JupiterDEXClient:
     
     def __init__(self, wallet: SolanaWallet):
         self.wallet = wallet
-        self.base_url = "https://quote-api.jup.ag/v6"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'SolanaGridBot/1.0'
-        })
+        self.quote_url = Config.JUPITER_QUOTE_URL
+        self.swap_url = Config.JUPITER_SWAP_URL
+        self.session = JUPITER_SESSION
         
     def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Optional[DEXPrice]:
         """Get a price quote for a swap.
@@ -68,7 +152,7 @@ class JupiterDEXClient:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                url = f"{self.base_url}/quote"
+                url = self.quote_url
                 params = {
                     "inputMint": input_mint,
                     "outputMint": output_mint,
@@ -80,7 +164,7 @@ class JupiterDEXClient:
                 logger.debug(f"Jupiter quote request: {params}")
                 response = self.session.get(url, params=params, timeout=10)
                 response.raise_for_status()
-                data = response.json()
+                data = json_loads(response.content)
                 
                 # Validate response structure - Jupiter v6 uses inAmount/outAmount
                 if 'inAmount' not in data or 'outAmount' not in data:
@@ -88,8 +172,8 @@ class JupiterDEXClient:
                     return None
                 
                 # Calculate display amounts (assuming 9 decimals for SOL, 6 for USDC)
-                input_decimals = 9 if input_mint == "So11111111111111111111111111111111111111112" else 6
-                output_decimals = 6 if output_mint == "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v" else 9
+                input_decimals = 9 if input_mint == SOL_MINT else 6
+                output_decimals = 6 if output_mint == USDC_MINT else 9
                 
                 input_amount_display = float(data['inAmount']) / (10 ** input_decimals)
                 output_amount_display = float(data['outAmount']) / (10 ** output_decimals)
@@ -157,7 +241,7 @@ class JupiterDEXClient:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                url = f"{self.base_url}/quote"
+                url = self.quote_url
                 params = {
                     "inputMint": input_mint,
                     "outputMint": output_mint,
@@ -169,7 +253,7 @@ class JupiterDEXClient:
                 logger.debug(f"Jupiter raw quote request: {params}")
                 response = self.session.get(url, params=params, timeout=10)
                 response.raise_for_status()
-                data = response.json()
+                data = json_loads(response.content)
                 
                 # Validate response structure - Jupiter v6 uses inAmount/outAmount
                 if 'inAmount' not in data or 'outAmount' not in data:
@@ -215,34 +299,26 @@ class JupiterDEXClient:
         Returns:
             Base64 encoded serialized transaction or None if failed
         """
+        payload = SWAP_PAYLOAD_TEMPLATE.copy()
+        payload["quoteResponse"] = quote_response
+        payload["userPublicKey"] = user_public_key
+        body = json_dumps(payload)
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                url = f"{self.base_url}/swap"
-                
-                payload = {
-                    "quoteResponse": quote_response,
-                    "userPublicKey": user_public_key,
-                    "wrapAndUnwrapSol": True,
-                    "dynamicComputeUnitLimit": True,
-                    # CRITICAL FIX: Force Jupiter to NOT use address table lookups for devnet compatibility
-                    "useVersionedTransactions": False,  # Use legacy transactions without address tables
-                    "asLegacyTransaction": True,        # Force legacy format for devnet compatibility
-                    "prioritizationFeeLamports": 1000,
-                    "useTokenLedger": False
-                }
+                url = self.swap_url
                 
                 logger.debug(f"Jupiter swap request for user: {user_public_key}")
-                response = self.session.post(url, json=payload, timeout=15)
+                response = self.session.post(url, data=body, timeout=15)
                 response.raise_for_status()
-                data = response.json()
+                transaction_base64 = extract_swap_transaction(response.content)
                 
                 # Validate response structure
-                if 'swapTransaction' not in data:
+                if transaction_base64 is None:
                     logger.error(f"Invalid Jupiter swap response: missing swapTransaction")
                     return None
                 
-                transaction_base64 = data['swapTransaction']
                 logger.info(f"Jupiter swap transaction prepared successfully")
                 return transaction_base64
                 
@@ -360,8 +436,8 @@ class DEXManager:
         
         # Common token mints
         self.tokens = {
-            "SOL": "So11111111111111111111111111111111111111112",
-            "USDC": "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",
+            "SOL": SOL_MINT,
+            "USDC": USDC_MINT,
             "USDT": "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB",
             "ETH": "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs",
             "BONK": "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",
@@ -429,7 +505,7 @@ class DEXManager:
                 return None
             
             # Step 2: Get swap transaction
-            user_public_key = str(self.wallet.public_key)
+            user_public_key = self.wallet.public_key_str
             transaction_b64 = self.jupiter.get_swap_transaction(quote_response, user_public_key)
             if not transaction_b64:
                 logger.error("Failed to get swap transaction")
@@ -466,7 +542,7 @@ class DEXManager:
             Transaction signature if successful, None otherwise
         """
         try:
-            user_public_key = str(self.wallet.public_key)
+            user_public_key = self.wallet.public_key_str
             
             # Step 1: Get serialized transaction from Jupiter
             transaction_b64 = self.jupiter.get_swap_transaction(quote_response, user_public_key)
@@ -475,10 +551,9 @@ class DEXManager:
                 return None
             
             # Step 2: Deserialize and send transaction
-            import base64
             from solders.transaction import VersionedTransaction
             
-            transaction_bytes = base64.b64decode(transaction_b64)
+            transaction_bytes = b64decode(transaction_b64)
             transaction = VersionedTransaction.from_bytes(transaction_bytes)
             
             # CRITICAL FIX: Use fresh blockhash reconstruction for network compatibility
@@ -530,12 +605,11 @@ class DEXManager:
             Transaction signature if successful, None otherwise
         """
         try:
-            import base64
             from solders.transaction import VersionedTransaction
             from solana.rpc.commitment import Commitment
             
             # Deserialize transaction from base64
-            transaction_bytes = base64.b64decode(transaction_b64)
+            transaction_bytes = b64decode(transaction_b64)
             
             # Try to parse as VersionedTransaction first, then fall back to legacy Transaction
             try:
@@ -619,6 +693,9 @@ class DEXManager:
                 "slippage_bps": slippage_bps
             })
             
+            # Warm the blockhash cache while the quote is in flight
+            _PREFETCH_EXECUTOR.submit(self.wallet.blockhash_cache.get)
+            
             raw_quote = self.jupiter.get_raw_quote(input_mint, output_mint, amount_smallest, slippage_bps)
             if not raw_quote:
                 self.log_transaction_pipeline("QUOTE", "FAILED", {"reason": "No quote received"})
@@ -637,7 +714,7 @@ class DEXManager:
             
             # Step 2: Immediately get fresh transaction with current blockhash
             tx_start = time.time()
-            user_public_key = str(self.wallet.public_key)
+            user_public_key = self.wallet.public_key_str
             
             self.log_transaction_pipeline("TRANSACTION", "REQUESTING", {
                 "user_key": user_public_key[:8] + "...",
@@ -705,7 +782,6 @@ class DEXManager:
             Transaction signature if successful, None otherwise
         """
         try:
-            import base64
             import time
             from solders.transaction import VersionedTransaction, Transaction
             from solders.message import MessageV0
@@ -714,7 +790,7 @@ class DEXManager:
             execution_start = time.time()
             
             # Step 1: Parse transaction bytes
-            transaction_bytes = base64.b64decode(transaction_b64)
+            transaction_bytes = b64decode(transaction_b64)
             
             # Try to parse as VersionedTransaction first, then fall back to legacy Transaction
             try:
@@ -727,10 +803,9 @@ class DEXManager:
                 is_versioned = False
                 logger.debug("🔄 Parsed as legacy Transaction")
             
-            # Step 2: Get fresh blockhash immediately
+            # Step 2: Get fresh blockhash immediately (shared with the signing step via the cache)
             blockhash_start = time.time()
-            recent_blockhash_response = self.wallet.rpc_client.get_latest_blockhash()
-            fresh_blockhash = recent_blockhash_response.value.blockhash
+            fresh_blockhash = self.wallet.blockhash_cache.get()
             blockhash_elapsed = time.time() - blockhash_start
             
             self.log_transaction_pipeline("BLOCKHASH", "FRESH", {
@@ -816,6 +891,7 @@ class DEXManager:
                 logger.error(f"❌ Phase 1B transaction size error: {error_msg}")
                 logger.error("💡 Consider using smaller amounts or simpler routing")
             elif self.detect_blockhash_errors(error_msg):
+                self.wallet.blockhash_cache.invalidate()
                 logger.error(f"❌ Phase 1B blockhash error: {error_msg}")
             else:
                 logger.error(f"❌ Phase 1B execution failed: {error_msg}")
@@ -831,11 +907,10 @@ class DEXManager:
             Transaction signature if successful, None otherwise
         """
         try:
-            import base64
             from solders.transaction import VersionedTransaction
             
             # Parse transaction (no blockhash modification)
-            transaction_bytes = base64.b64decode(transaction_b64)
+            transaction_bytes = b64decode(transaction_b64)
             
             # Try to parse as VersionedTransaction first, then fall back to legacy Transaction
             try:
@@ -865,6 +940,7 @@ class DEXManager:
         except Exception as e:
             error_msg = str(e)
             if self.detect_blockhash_errors(error_msg):
+                self.wallet.blockhash_cache.invalidate()
                 logger.error(f"❌ Blockhash-related error detected: {error_msg}")
             else:
                 logger.error(f"❌ Fast transaction execution failed: {error_msg}")
@@ -925,8 +1001,9 @@ class DEXManager:
             output_mint = self.tokens.get(output_token, output_token)
             amount_smallest = int(amount * (1e9 if input_token == "SOL" else 1e6))
             
-            # Get quote
+            # Get quote, warming the blockhash cache while it is in flight
             quote_start = time.time()
+            _PREFETCH_EXECUTOR.submit(self.wallet.blockhash_cache.get)
             raw_quote = self.jupiter.get_raw_quote(input_mint, output_mint, amount_smallest, slippage_bps)
             if not raw_quote:
                 self.log_transaction_pipeline("QUOTE", "FAILED", {"reason": "No quote received"})
@@ -935,7 +1012,7 @@ class DEXManager:
             
             # Immediate transaction request (no delay)
             tx_start = time.time()
-            user_public_key = str(self.wallet.public_key)
+            user_public_key = self.wallet.public_key_str
             transaction_b64 = self.jupiter.get_swap_transaction(raw_quote, user_public_key)
             if not transaction_b64:
                 self.log_transaction_pipeline("TRANSACTION", "FAILED", {"reason": "No transaction received"})
@@ -985,6 +1062,8 @@ class DEXManager:
             status: Status of the stage (e.g., 'READY', 'CREATED', 'COMPLETED', 'FAILED')
             details: Optional dictionary of additional details to log
         """
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info(f"🔄 TRANSACTION PIPELINE: {stage} - {status}")
         if details:
             for key, value in details.items():
@@ -1030,11 +1109,11 @@ class DEXManager:
                                 return False
                     
                     # Wait before next check
-                    time.sleep(2)
+                    time.sleep(CONFIRMATION_POLL_INTERVAL)
                     
                 except Exception as e:
                     logger.warning(f"Error checking transaction status: {e}")
-                    time.sleep(2)
+                    time.sleep(CONFIRMATION_POLL_INTERVAL)
                     continue
             
             logger.warning(f"Transaction confirmation timeout: {signature}")
@@ -1193,9 +1272,20 @@ class DEXManager:
             amount: Amount to swap
             slippage_bps: Slippage tolerance in basis points
         """
+        if not logger.isEnabledFor(logging.INFO):
+            return
         logger.info("🚀 INITIATING SWAP")
         logger.info(f"📊 Pair: {input_token}/{output_token}")
         logger.info(f"💵 Amount: {amount} {input_token}")
         logger.info(f"🎯 Slippage: {slippage_bps/100:.2f}%")
-        logger.info(f"👤 Wallet: {str(self.wallet.public_key)[:8]}...")
-        logger.info("-"*40) 
\ No newline at end of file
+        logger.info("👤 Wallet: %s...", self.wallet.public_key_short)
+        logger.info("-"*40)
+
+
+def get_dex_manager(wallet: SolanaWallet) -> DEXManager:
+    """Return the DEXManager bound to a wallet, creating it on first use."""
+    dex_manager = wallet._dex_manager
+    if dex_manager is None:
+        dex_manager = DEXManager(wallet)
+        wallet._dex_manager = dex_manager
+    return dex_manager
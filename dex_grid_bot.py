@@ -1,16 +1,16 @@
 import time
-import uuid
+import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 
 from config import Config
 from security import SecurityManager
 from risk_manager import RiskManager, Position
 from solana_wallet import SolanaWallet
-from dex_client import DEXManager, DEXPrice
-from utils import setup_logging, display_performance_summary
+from dex_client import DEXPrice, get_dex_manager
+from utils import display_performance_summary, run_async
 
 logger = logging.getLogger(__name__)
 
@@ -37,8 +37,9 @@ class DEXGridTradingBot:
         
         # Initialize wallet and DEX manager
         if config.PRIVATE_KEY:
-            self.wallet = SolanaWallet(config.PRIVATE_KEY, config.RPC_URL)
-            self.dex_manager = DEXManager(self.wallet)
+            self.wallet = SolanaWallet(config.PRIVATE_KEY, config.RPC_URL, send_rpc_url=config.SEND_RPC_URL,
+                                       skip_preflight=config.SKIP_PREFLIGHT)
+            self.dex_manager = get_dex_manager(self.wallet)
             self.trading_mode = "DEX"
         else:
             self.wallet = None
@@ -48,9 +49,21 @@ class DEXGridTradingBot:
         self.risk_manager = RiskManager(config.get_trading_config())
         
         self.grid_levels: List[DEXGridLevel] = []
+        # Levels sorted by trigger price so triggered levels can be found by bisection
+        self._buy_prices_sorted: List[float] = []
+        self._levels_by_buy_price: List[DEXGridLevel] = []
+        self._sell_prices_sorted: List[float] = []
+        self._levels_by_sell_price: List[DEXGridLevel] = []
+        # Originating level of each executed swap, keyed by transaction signature
+        self._level_by_sig: Dict[str, DEXGridLevel] = {}
         self.active_positions: Dict[str, Dict] = {}
         self.is_running = False
-        self.session_start = time.time()
+        # Set by stop(); sticky, so a signal during startup keeps the bot from trading
+        self._stop_requested = False
+        # Event loop and stop event of the running session, so stop() can wake it from any thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self.session_start = time.monotonic_ns()
         
         # Performance tracking
         self.total_profit = 0.0
@@ -117,14 +130,23 @@ class DEXGridTradingBot:
                 )
                 self.grid_levels.append(grid_level)
             
+            self._rebuild_price_index()
+            
             logger.info(f"Initialized {len(self.grid_levels)} grid levels")
-            logger.info(f"Buy prices: {[level.buy_price for level in self.grid_levels]}")
-            logger.info(f"Sell prices: {[level.sell_price for level in self.grid_levels]}")
+            logger.info(f"Buy prices: {buy_prices[:len(self.grid_levels)]}")
+            logger.info(f"Sell prices: {sell_prices[:len(self.grid_levels)]}")
             
         except Exception as e:
             logger.error(f"Failed to initialize grid: {e}")
             raise
     
+    def _rebuild_price_index(self):
+        """Rebuild the sorted buy/sell price index over the grid levels."""
+        self._levels_by_buy_price = sorted(self.grid_levels, key=lambda level: level.buy_price)
+        self._buy_prices_sorted = [level.buy_price for level in self._levels_by_buy_price]
+        self._levels_by_sell_price = sorted(self.grid_levels, key=lambda level: level.sell_price)
+        self._sell_prices_sorted = [level.sell_price for level in self._levels_by_sell_price]
+    
     def place_grid_orders(self, current_price: float):
         """Place initial grid orders on DEX."""
         if self.trading_mode != "DEX":
@@ -141,6 +163,7 @@ class DEXGridTradingBot:
                 return
             
             input_token, output_token = tokens
+            quoted_levels = 0
             
             for level in self.grid_levels:
                 # Calculate position size
@@ -150,6 +173,8 @@ class DEXGridTradingBot:
                 
                 if position_size <= 0:
                     logger.warning(f"Skipping level {level.level} - insufficient position size")
+                    if level.buy_quote or level.sell_quote:
+                        quoted_levels += 1
                     continue
                 
                 # Get quotes for buy and sell orders
@@ -188,82 +213,95 @@ class DEXGridTradingBot:
                             
                     except Exception as e:
                         logger.error(f"Failed to get sell quote at level {level.level}: {e}")
+                
+                if level.buy_quote or level.sell_quote:
+                    quoted_levels += 1
             
-            logger.info(f"Grid quotes obtained for {len([l for l in self.grid_levels if l.buy_quote or l.sell_quote])} levels")
+            logger.info(f"Grid quotes obtained for {quoted_levels} levels")
             
         except Exception as e:
             logger.error(f"Failed to place grid orders: {e}")
             raise
     
-    def execute_grid_trades(self):
+    def execute_grid_trades(self, current_price: Optional[float] = None):
         """Execute trades when market conditions are met."""
         if self.trading_mode != "DEX":
             return
         
         try:
-            current_price = self.dex_manager.get_market_price(self.config.TRADING_PAIR)
+            if current_price is None:
+                current_price = self.dex_manager.get_market_price(self.config.TRADING_PAIR)
             if not current_price:
                 logger.warning("Could not get current market price")
                 return
             
             logger.info(f"Current price: {current_price:.6f}")
+            executed_positions: List[Position] = []
             
-            for level in self.grid_levels:
-                # Check if buy order should be executed
-                if (not level.buy_executed and 
-                    level.buy_quote and 
-                    current_price <= level.buy_price):
-                    
-                    try:
-                        logger.info(f"Executing buy order at level {level.level}")
-                        signature = self.dex_manager.execute_swap(level.buy_quote)
-                        if signature:
-                            level.buy_executed = True
-                            level.buy_signature = signature
-                            
-                            # Add position to risk manager
-                            position = Position(
-                                id=signature,
-                                side="buy",
-                                quantity=level.buy_quote.input_amount,
-                                price=level.buy_price,
-                                timestamp=time.time(),
-                                status="filled"
-                            )
-                            self.risk_manager.add_position(position)
-                            
-                            logger.info(f"Buy order executed: {signature}")
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to execute buy order at level {level.level}: {e}")
+            # Buy orders trigger on every level priced at or above the market
+            first_buy = bisect_left(self._buy_prices_sorted, current_price)
+            for level in self._levels_by_buy_price[first_buy:]:
+                if level.buy_executed or not level.buy_quote:
+                    continue
                 
-                # Check if sell order should be executed
-                if (not level.sell_executed and 
-                    level.sell_quote and 
-                    current_price >= level.sell_price):
-                    
-                    try:
-                        logger.info(f"Executing sell order at level {level.level}")
-                        signature = self.dex_manager.execute_swap(level.sell_quote)
-                        if signature:
-                            level.sell_executed = True
-                            level.sell_signature = signature
-                            
-                            # Add position to risk manager
-                            position = Position(
-                                id=signature,
-                                side="sell",
-                                quantity=level.sell_quote.input_amount,
-                                price=level.sell_price,
-                                timestamp=time.time(),
-                                status="filled"
-                            )
-                            self.risk_manager.add_position(position)
-                            
-                            logger.info(f"Sell order executed: {signature}")
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to execute sell order at level {level.level}: {e}")
+                logger.info(f"Executing buy order at level {level.level}")
+                try:
+                    signature = self.dex_manager.execute_swap(level.buy_quote)
+                except Exception as e:
+                    logger.error(f"Failed to execute buy order at level {level.level}: {e}")
+                    continue
+                if not signature:
+                    continue
+                
+                level.buy_executed = True
+                level.buy_signature = signature
+                self._level_by_sig[signature] = level
+                
+                # Add position to risk manager
+                executed_positions.append(Position(
+                    id=signature,
+                    side="buy",
+                    quantity=level.buy_quote.input_amount,
+                    price=level.buy_price,
+                    timestamp=time.monotonic_ns(),
+                    status="filled"
+                ))
+                
+                logger.info(f"Buy order executed: {signature}")
+            
+            # Sell orders trigger on every level priced at or below the market
+            last_sell = bisect_right(self._sell_prices_sorted, current_price)
+            for level in self._levels_by_sell_price[:last_sell]:
+                if level.sell_executed or not level.sell_quote:
+                    continue
+                
+                logger.info(f"Executing sell order at level {level.level}")
+                try:
+                    signature = self.dex_manager.execute_swap(level.sell_quote)
+                except Exception as e:
+                    logger.error(f"Failed to execute sell order at level {level.level}: {e}")
+                    continue
+                if not signature:
+                    continue
+                
+                level.sell_executed = True
+                level.sell_signature = signature
+                self._level_by_sig[signature] = level
+                
+                # Add position to risk manager
+                executed_positions.append(Position(
+                    id=signature,
+                    side="sell",
+                    quantity=level.sell_quote.input_amount,
+                    price=level.sell_price,
+                    timestamp=time.monotonic_ns(),
+                    status="filled"
+                ))
+                
+                logger.info(f"Sell order executed: {signature}")
+            
+            # Register this tick's fills with the risk manager in one update
+            self.risk_manager.add_positions(executed_positions)
             
         except Exception as e:
             logger.error(f"Failed to execute grid trades: {e}")
@@ -289,29 +327,55 @@ class DEXGridTradingBot:
             # In DEX mode, positions are typically closed by executing opposite trades
             # This would need to be implemented based on the specific DEX protocol
             
+            # Free the originating level so it can be re-quoted
+            level = self._level_by_sig.pop(position_id, None)
+            if level is not None:
+                if level.buy_signature == position_id:
+                    level.buy_executed = False
+                    level.buy_signature = None
+                    level.buy_quote = None
+                elif level.sell_signature == position_id:
+                    level.sell_executed = False
+                    level.sell_signature = None
+                    level.sell_quote = None
+            
         except Exception as e:
             logger.error(f"Failed to close position {position_id}: {e}")
     
     def _update_grid_levels(self, current_price: float):
         """Update grid levels based on market conditions."""
         try:
+            prices_changed = False
+            grid_prices = None
+            
             # Check if we need to adjust grid levels
             for level in self.grid_levels:
                 # If both orders are executed, we can place new orders
                 if level.buy_executed and level.sell_executed:
                     # Reset level
+                    self._level_by_sig.pop(level.buy_signature, None)
+                    self._level_by_sig.pop(level.sell_signature, None)
                     level.buy_executed = False
                     level.sell_executed = False
                     level.buy_quote = None
                     level.sell_quote = None
+                    level.buy_signature = None
+                    level.sell_signature = None
                     
-                    # Recalculate prices based on current market
-                    buy_prices, sell_prices = self.risk_manager.get_optimal_grid_levels(current_price)
+                    # Recalculate prices based on current market (once per tick)
+                    if grid_prices is None:
+                        grid_prices = self.risk_manager.get_optimal_grid_levels(current_price)
+                    buy_prices, sell_prices = grid_prices
                     level.buy_price = buy_prices[level.level - 1]
                     level.sell_price = sell_prices[level.level - 1]
                     
+                    prices_changed = True
+                    
                     logger.info(f"Updated grid level {level.level}: buy={level.buy_price}, sell={level.sell_price}")
             
+            if prices_changed:
+                self._rebuild_price_index()
+            
         except Exception as e:
             logger.error(f"Failed to update grid levels: {e}")
     
@@ -319,6 +383,9 @@ class DEXGridTradingBot:
         """Main execution loop for DEX grid trading."""
         try:
             logger.info("Starting DEX grid trading bot...")
+            if self._stop_requested:
+                logger.info("Stop requested before trading started")
+                return
             self.is_running = True
             
             # Place initial grid orders
@@ -326,42 +393,94 @@ class DEXGridTradingBot:
             self.place_grid_orders(current_price)
             
             # Main loop
-            while self.is_running:
-                try:
-                    # Check if we should continue trading
-                    if not self.risk_manager.should_continue_trading():
-                        logger.warning("Risk limits exceeded, stopping trading")
-                        break
-                    
-                    # Execute grid trades
-                    self.execute_grid_trades()
-                    
-                    # Get current market price
-                    current_price = self.dex_manager.get_market_price(self.config.TRADING_PAIR)
-                    if current_price:
-                        # Manage positions
-                        self.manage_positions(current_price)
-                    
-                    # Display performance summary every 10 minutes
-                    if int(time.time() - self.session_start) % 600 == 0:
-                        self._display_summary()
-                    
-                    # Sleep
-                    time.sleep(self.config.CHECK_INTERVAL)
-                    
-                except KeyboardInterrupt:
-                    logger.info("Received interrupt signal, stopping bot...")
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main loop: {e}")
-                    time.sleep(self.config.RETRY_DELAY)
-            
-            # Cleanup
-            self._cleanup()
+            run_async(self._run_event_loop())
             
+        except KeyboardInterrupt:
+            logger.info("Received interrupt signal, stopping bot...")
         except Exception as e:
             logger.error(f"Bot execution failed: {e}")
-            self._cleanup()
+        
+        # Cleanup
+        self._cleanup()
+    
+    async def _run_event_loop(self):
+        """Run the price producer, trade consumer and summary tasks until one of them stops or stop() is called."""
+        # Only the freshest price matters, so the queue holds a single tick
+        price_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        # Publish the loop only once the event exists, so stop() never sees one without the other
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            # stop() ran before the loop was published and could not wake it
+            self._stop_event.set()
+        tasks = [
+            asyncio.ensure_future(self._stop_event.wait()),
+            asyncio.ensure_future(self._price_producer(price_queue)),
+            asyncio.ensure_future(self._trade_consumer(price_queue)),
+            asyncio.ensure_future(self._summary_task()),
+        ]
+        
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.is_running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop = None
+    
+    async def _price_producer(self, price_queue: asyncio.Queue):
+        """Poll the DEX for the market price and publish each tick to the queue."""
+        loop = asyncio.get_running_loop()
+        
+        while self.is_running:
+            try:
+                current_price = await loop.run_in_executor(
+                    None, self.dex_manager.get_market_price, self.config.TRADING_PAIR
+                )
+                if current_price:
+                    # Drop the stale tick if the consumer has not picked it up yet
+                    if price_queue.full():
+                        price_queue.get_nowait()
+                    price_queue.put_nowait(current_price)
+                else:
+                    logger.warning("Could not get current market price")
+                
+                await asyncio.sleep(self.config.CHECK_INTERVAL)
+                
+            except Exception as e:
+                logger.error(f"Error fetching market price: {e}")
+                await asyncio.sleep(self.config.RETRY_DELAY)
+    
+    async def _trade_consumer(self, price_queue: asyncio.Queue):
+        """Execute grid trades and manage positions for every price tick."""
+        loop = asyncio.get_running_loop()
+        
+        while self.is_running:
+            current_price = await price_queue.get()
+            
+            # Check if we should continue trading
+            if not self.risk_manager.should_continue_trading():
+                logger.warning("Risk limits exceeded, stopping trading")
+                break
+            
+            try:
+                # Trades and position management share grid state, so they run in order on one worker
+                await loop.run_in_executor(None, self._process_price_tick, current_price)
+            except Exception as e:
+                logger.error(f"Error in main loop: {e}")
+                await asyncio.sleep(self.config.RETRY_DELAY)
+    
+    def _process_price_tick(self, current_price: float):
+        """Execute grid trades and manage positions at the given price."""
+        self.execute_grid_trades(current_price)
+        self.manage_positions(current_price)
+    
+    async def _summary_task(self):
+        """Display a performance summary every 10 minutes."""
+        while self.is_running:
+            await asyncio.sleep(600)
+            self._display_summary()
     
     def _display_summary(self):
         """Display performance summary."""
@@ -388,4 +507,13 @@ class DEXGridTradingBot:
     def stop(self):
         """Stop the bot gracefully."""
         logger.info("Stopping bot...")
-        self.is_running = False 
\ No newline at end of file
+        self._stop_requested = True
+        self.is_running = False
+        
+        # Wake the event loop so pending sleeps are cancelled instead of running out
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # The loop already closed
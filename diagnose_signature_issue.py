@@ -10,8 +10,9 @@ to identify the root cause of the signature verification failure.
 import os
 import sys
 import json
-import base64
+import asyncio
 import logging
+from functools import partial
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
@@ -22,6 +23,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Swap request used by the transaction creation stage
+_SWAP_TEMPLATE = {
+    "userPublicKey": None,
+    "quoteResponse": None,
+    "asLegacyTransaction": True,  # Force legacy transaction
+    "prioritizationFeeLamports": "auto"
+}
+
 def test_environment_setup():
     """Test environment configuration."""
     print("🔧 TESTING ENVIRONMENT SETUP")
@@ -51,8 +60,8 @@ def test_environment_setup():
     
     # RPC URL is determined by config, not environment directly
     try:
-        from config import Config
-        config = Config()
+        from config import get_config
+        config = get_config()
         print(f"  ✅ RPC_URL: {config.RPC_URL}")
     except Exception as e:
         print(f"  ⚠️  RPC_URL: Error loading config - {e}")
@@ -71,10 +80,10 @@ def test_wallet_initialization():
     
     try:
         from solana_wallet import SolanaWallet
-        from config import Config
+        from config import get_config
         
         # Load config
-        config = Config()
+        config = get_config()
         
         # Initialize wallet
         wallet = SolanaWallet(
@@ -83,7 +92,7 @@ def test_wallet_initialization():
             wallet_type=config.WALLET_TYPE
         )
         
-        print(f"  ✅ Wallet initialized: {str(wallet.public_key)[:8]}...")
+        print(f"  ✅ Wallet initialized: {wallet.public_key_short}...")
         print(f"  ✅ Wallet type: {wallet.wallet_type}")
         print(f"  ✅ RPC URL: {wallet.rpc_client._provider.endpoint_uri}")
         
@@ -100,36 +109,42 @@ def test_wallet_initialization():
         print(f"  ❌ Wallet initialization failed: {e}")
         return None
 
-def test_jupiter_quote(wallet):
+async def test_jupiter_quote(wallet):
     """Test Jupiter API quote functionality."""
-    print("\n📊 TESTING JUPITER QUOTE")
-    print("="*50)
-    
+    # The quote runs alongside the RPC check, so its section is printed once it returns
+    quote, error = None, None
     try:
-        from dex_client import DEXManager
+        from dex_client import get_dex_manager, SOL_MINT, USDC_MINT
         
         # Initialize DEX manager
-        dex = DEXManager(wallet)
+        dex = get_dex_manager(wallet)
         
         # Test quote
-        quote = dex.jupiter.get_raw_quote(
-            input_mint="So11111111111111111111111111111111111111112",  # SOL
-            output_mint="EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
+        loop = asyncio.get_running_loop()
+        quote = await loop.run_in_executor(None, partial(
+            dex.jupiter.get_raw_quote,
+            input_mint=SOL_MINT,
+            output_mint=USDC_MINT,
             amount=10000000  # 0.01 SOL in lamports
-        )
-        
-        if quote:
-            print(f"  ✅ Quote successful")
-            print(f"  ✅ Input amount: {quote.get('inAmount', 'N/A')}")
-            print(f"  ✅ Output amount: {quote.get('outAmount', 'N/A')}")
-            print(f"  ✅ Route plan: {'Yes' if quote.get('routePlan') else 'No'}")
-            return quote
-        else:
-            print("  ❌ Quote failed")
-            return None
-            
+        ))
     except Exception as e:
-        print(f"  ❌ Jupiter quote error: {e}")
+        error = e
+    
+    print("\n📊 TESTING JUPITER QUOTE")
+    print("="*50)
+    
+    if error is not None:
+        print(f"  ❌ Jupiter quote error: {error}")
+        return None
+    
+    if quote:
+        print(f"  ✅ Quote successful")
+        print(f"  ✅ Input amount: {quote.get('inAmount', 'N/A')}")
+        print(f"  ✅ Output amount: {quote.get('outAmount', 'N/A')}")
+        print(f"  ✅ Route plan: {'Yes' if quote.get('routePlan') else 'No'}")
+        return quote
+    else:
+        print("  ❌ Quote failed")
         return None
 
 def test_transaction_creation(wallet, quote):
@@ -138,41 +153,38 @@ def test_transaction_creation(wallet, quote):
     print("="*50)
     
     try:
-        from dex_client import DEXManager
-        import requests
+        from config import get_config
+        from dex_client import get_dex_manager, extract_swap_transaction, JUPITER_SESSION
+        from utils import b64decode, json_dumps
         
         # Initialize DEX manager
-        dex = DEXManager(wallet)
+        dex = get_dex_manager(wallet)
         
         # Prepare swap request
-        swap_payload = {
-            "userPublicKey": str(wallet.public_key),
-            "quoteResponse": quote,
-            "asLegacyTransaction": True,  # Force legacy transaction
-            "prioritizationFeeLamports": "auto"
-        }
+        swap_payload = _SWAP_TEMPLATE.copy()
+        swap_payload["userPublicKey"] = wallet.public_key_str
+        swap_payload["quoteResponse"] = quote
         
-        print(f"  📝 User public key: {str(wallet.public_key)[:8]}...")
+        print(f"  📝 User public key: {wallet.public_key_short}...")
         print(f"  📝 Legacy transaction: {swap_payload['asLegacyTransaction']}")
         print(f"  📝 Priority fee: {swap_payload['prioritizationFeeLamports']}")
         
         # Make request to Jupiter swap API
-        response = requests.post(
-            "https://quote-api.jup.ag/v6/swap",
-            json=swap_payload,
-            headers={"Content-Type": "application/json"},
+        response = JUPITER_SESSION.post(
+            get_config().JUPITER_SWAP_URL,
+            data=json_dumps(swap_payload),
             timeout=30
         )
         
         if response.status_code == 200:
-            swap_data = response.json()
-            transaction_b64 = swap_data.get('swapTransaction')
+            transaction_b64 = extract_swap_transaction(response.content)
             
             print(f"  ✅ Transaction created successfully")
             print(f"  ✅ Transaction length: {len(transaction_b64)} characters")
             print(f"  ✅ Transaction preview: {transaction_b64[:50]}...")
             
-            return transaction_b64
+            # Decode once here; later stages work on the raw bytes
+            return b64decode(transaction_b64)
         else:
             print(f"  ❌ Transaction creation failed: {response.status_code}")
             print(f"  ❌ Response: {response.text}")
@@ -182,45 +194,34 @@ def test_transaction_creation(wallet, quote):
         print(f"  ❌ Transaction creation error: {e}")
         return None
 
-def test_transaction_parsing(transaction_b64):
+def test_transaction_parsing(transaction_bytes):
     """Test transaction parsing and structure."""
     print("\n🔍 TESTING TRANSACTION PARSING")
     print("="*50)
     
     try:
         from solders.transaction import Transaction, VersionedTransaction
+        from dex_client import is_versioned_transaction
         
-        # Decode base64
-        transaction_bytes = base64.b64decode(transaction_b64)
         print(f"  ✅ Base64 decoded: {len(transaction_bytes)} bytes")
         
-        # Try parsing as different transaction types
-        try:
-            # Try as Transaction first
-            transaction = Transaction.from_bytes(transaction_bytes)
-            print(f"  ✅ Parsed as Transaction")
-            print(f"  ✅ Recent blockhash: {transaction.message.recent_blockhash}")
-            print(f"  ✅ Instructions: {len(transaction.message.instructions)}")
-            print(f"  ✅ Signatures: {len(transaction.signatures)}")
-            
-            return transaction, "Transaction"
-            
-        except Exception as e1:
-            print(f"  ⚠️  Transaction parsing failed: {e1}")
-            
-            try:
-                # Try as VersionedTransaction
-                versioned_tx = VersionedTransaction.from_bytes(transaction_bytes)
-                print(f"  ✅ Parsed as VersionedTransaction")
-                print(f"  ✅ Message type: {type(versioned_tx.message)}")
-                print(f"  ✅ Signatures: {len(versioned_tx.signatures)}")
-                
-                return versioned_tx, "VersionedTransaction"
-                
-            except Exception as e2:
-                print(f"  ❌ VersionedTransaction parsing failed: {e2}")
-                return None, None
+        # The message prefix says which format this is, so parse it directly
+        if is_versioned_transaction(transaction_bytes):
+            versioned_tx = VersionedTransaction.from_bytes(transaction_bytes)
+            print(f"  ✅ Parsed as VersionedTransaction")
+            print(f"  ✅ Message type: {type(versioned_tx.message)}")
+            print(f"  ✅ Signatures: {len(versioned_tx.signatures)}")
             
+            return versioned_tx, "VersionedTransaction"
+        
+        transaction = Transaction.from_bytes(transaction_bytes)
+        print(f"  ✅ Parsed as Transaction")
+        print(f"  ✅ Recent blockhash: {transaction.message.recent_blockhash}")
+        print(f"  ✅ Instructions: {len(transaction.message.instructions)}")
+        print(f"  ✅ Signatures: {len(transaction.signatures)}")
+        
+        return transaction, "Transaction"
+        
     except Exception as e:
         print(f"  ❌ Transaction parsing error: {e}")
         return None, None
@@ -238,8 +239,7 @@ def test_transaction_signing(wallet, transaction, tx_type):
         if tx_type == "Transaction":
             print("  🔧 Signing as Transaction...")
             # Get recent blockhash for legacy transactions
-            recent_blockhash_response = wallet.rpc_client.get_latest_blockhash()
-            transaction.sign([wallet.keypair], recent_blockhash_response.value.blockhash)
+            transaction.sign([wallet.keypair], wallet.blockhash_cache.get())
             print("  ✅ Transaction signed successfully")
             
         elif tx_type == "VersionedTransaction":
@@ -252,6 +252,13 @@ def test_transaction_signing(wallet, transaction, tx_type):
             print(f"  ✅ Signatures present: {len(transaction.signatures)}")
             signature_preview = str(transaction.signatures[0])[:16] + "..."
             print(f"  ✅ First signature: {signature_preview}")
+
+            # Check every signer in one native call rather than one verify per signature
+            results = transaction.verify_with_results()
+            if all(results):
+                print(f"  ✅ All {len(results)} signature(s) verify")
+            else:
+                print(f"  ❌ Invalid signature(s) at index: {[i for i, ok in enumerate(results) if not ok]}")
         else:
             print("  ❌ No signatures found")
             return None
@@ -262,33 +269,71 @@ def test_transaction_signing(wallet, transaction, tx_type):
         print(f"  ❌ Transaction signing error: {e}")
         return None
 
-def test_rpc_connection(wallet):
+async def test_rpc_connection(wallet):
     """Test RPC connection and basic operations."""
-    print("\n🌐 TESTING RPC CONNECTION")
-    print("="*50)
-    
+    # The batch runs alongside the Jupiter quote, so its section is printed once it returns
+    error = None
     try:
-        # Test basic connection
-        response = wallet.rpc_client.get_slot()
-        print(f"  ✅ RPC connection successful")
-        print(f"  ✅ Current slot: {response.value}")
+        import requests
+        from config import get_config
+        from utils import json_dumps, json_loads
         
-        # Test account info
-        account_info = wallet.rpc_client.get_account_info(wallet.public_key)
-        if account_info.value:
-            print(f"  ✅ Account exists: {account_info.value.lamports} lamports")
-        else:
-            print("  ⚠️  Account not found or empty")
+        # Slot, account info and blockhash go out as one JSON-RPC batch (one round-trip)
+        batch = [
+            {"jsonrpc": "2.0", "id": 1, "method": "getSlot"},
+            {"jsonrpc": "2.0", "id": 2, "method": "getAccountInfo",
+             "params": [wallet.public_key_str, {"encoding": "base64"}]},
+            {"jsonrpc": "2.0", "id": 3, "method": "getLatestBlockhash"}
+        ]
+        
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, partial(
+            requests.post,
+            get_config().RPC_URL,
+            data=json_dumps(batch),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        ))
+        response.raise_for_status()
         
-        # Test recent blockhash
-        blockhash_response = wallet.rpc_client.get_latest_blockhash()
-        print(f"  ✅ Recent blockhash: {str(blockhash_response.value.blockhash)[:16]}...")
+        payload = json_loads(response.content)
+        if not isinstance(payload, list):
+            # A rejected batch comes back as a single error object
+            raise RuntimeError(f"RPC batch failed: {payload.get('error', payload)}")
         
-        return True
+        results = {}
+        for item in payload:
+            if 'error' in item:
+                raise RuntimeError(f"RPC request {item.get('id')} failed: {item['error']}")
+            results[item['id']] = item['result']
         
+        slot = results[1]
+        account_info = results[2]['value']
+        blockhash = results[3]['value']['blockhash']
     except Exception as e:
-        print(f"  ❌ RPC connection error: {e}")
+        error = e
+    
+    print("\n🌐 TESTING RPC CONNECTION")
+    print("="*50)
+    
+    if error is not None:
+        print(f"  ❌ RPC connection error: {error}")
         return False
+    
+    # Test basic connection
+    print(f"  ✅ RPC connection successful")
+    print(f"  ✅ Current slot: {slot}")
+    
+    # Test account info
+    if account_info:
+        print(f"  ✅ Account exists: {account_info['lamports']} lamports")
+    else:
+        print("  ⚠️  Account not found or empty")
+    
+    # Test recent blockhash
+    print(f"  ✅ Recent blockhash: {blockhash[:16]}...")
+    
+    return True
 
 def test_transaction_simulation(wallet, signed_transaction):
     """Test transaction simulation before sending."""
@@ -329,7 +374,7 @@ def test_transaction_simulation(wallet, signed_transaction):
         print(f"  ❌ Transaction simulation error: {e}")
         return False
 
-def main():
+async def main_async():
     """Run comprehensive diagnostic tests."""
     print("🚀 SIGNATURE VERIFICATION DIAGNOSTIC")
     print("="*60)
@@ -348,25 +393,29 @@ def main():
         print("\n❌ Wallet initialization failed.")
         return False
     
-    # Test 3: RPC connection
-    if not test_rpc_connection(wallet):
+    # Tests 3 & 4: RPC connection and Jupiter quote are independent, so run them
+    # concurrently (each prints its report once its network calls complete)
+    rpc_ok, quote = await asyncio.gather(
+        test_rpc_connection(wallet),
+        test_jupiter_quote(wallet)
+    )
+    
+    if not rpc_ok:
         print("\n❌ RPC connection failed.")
         return False
     
-    # Test 4: Jupiter quote
-    quote = test_jupiter_quote(wallet)
     if not quote:
         print("\n❌ Jupiter quote failed.")
         return False
     
     # Test 5: Transaction creation
-    transaction_b64 = test_transaction_creation(wallet, quote)
-    if not transaction_b64:
+    transaction_bytes = test_transaction_creation(wallet, quote)
+    if not transaction_bytes:
         print("\n❌ Transaction creation failed.")
         return False
     
     # Test 6: Transaction parsing
-    transaction, tx_type = test_transaction_parsing(transaction_b64)
+    transaction, tx_type = test_transaction_parsing(transaction_bytes)
     if not transaction:
         print("\n❌ Transaction parsing failed.")
         return False
@@ -394,6 +443,11 @@ def main():
     
     return True
 
+def main():
+    """Run the diagnostic on a fresh event loop."""
+    from utils import run_async
+    return run_async(main_async())
+
 if __name__ == "__main__":
     try:
         success = main()
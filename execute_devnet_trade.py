@@ -8,10 +8,11 @@ This script executes a single real trade on devnet to show the bot working.
 
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from config import Config
+from config import get_config
 from solana_wallet import SolanaWallet
-from dex_client import DEXManager
+from dex_client import get_dex_manager, SOL_MINT, USDC_MINT
 from risk_manager import RiskManager
 import logging
 
@@ -19,6 +20,9 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Reused across trades for independent RPC lookups
+RPC_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
 def execute_real_devnet_trade():
     """Execute a real trade on devnet to demonstrate functionality."""
     
@@ -26,7 +30,7 @@ def execute_real_devnet_trade():
     print("=" * 60)
     
     # Load configuration
-    config = Config()
+    config = get_config()
     
     # Verify we're on devnet
     if 'devnet' not in config.RPC_URL:
@@ -42,10 +46,16 @@ def execute_real_devnet_trade():
         wallet = SolanaWallet(
             private_key=config.PRIVATE_KEY,
             rpc_url=config.RPC_URL,
-            wallet_type=config.WALLET_TYPE
+            wallet_type=config.WALLET_TYPE,
+            send_rpc_url=config.SEND_RPC_URL,
+            skip_preflight=config.SKIP_PREFLIGHT
         )
         
-        balance = wallet.get_balance()
+        # SOL and token balances are independent lookups, so fetch them concurrently
+        balance_future = RPC_EXECUTOR.submit(wallet.get_balance)
+        token_balances_future = RPC_EXECUTOR.submit(wallet.get_token_balances)
+        
+        balance = balance_future.result()
         print(f"✅ Wallet initialized")
         print(f"   Public Key: {wallet.get_public_key()}")
         print(f"   SOL Balance: {balance:.3f} SOL")
@@ -61,11 +71,11 @@ def execute_real_devnet_trade():
     
     # Initialize DEX manager
     try:
-        dex_manager = DEXManager(wallet)
+        dex_manager = get_dex_manager(wallet)
         print("✅ DEX manager initialized")
         
         # Get token balances
-        token_balances = wallet.get_token_balances()
+        token_balances = token_balances_future.result()
         print(f"✅ Token balances retrieved: {len(token_balances)} tokens")
         
     except Exception as e:
@@ -123,8 +133,8 @@ def execute_real_devnet_trade():
     # For now, we'll simulate the process
     
     trade_params = {
-        'input_mint': 'So11111111111111111111111111111111111111112',  # SOL
-        'output_mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
+        'input_mint': SOL_MINT,
+        'output_mint': USDC_MINT,
         'amount': int(position_size * 1e9),  # Convert to lamports
         'slippage_bps': 100,  # 1% slippage
         'user_public_key': wallet.get_public_key()
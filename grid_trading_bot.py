@@ -1,20 +1,45 @@
 import time
-import uuid
+import asyncio
 import logging
-import schedule
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
 from config import Config
 from security import SecurityManager
 from risk_manager import RiskManager, Position
 from api_client import APIClient
-from utils import setup_logging, display_performance_summary
+from utils import DATACLASS_SLOTS, display_performance_summary, run_async
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Order states, other than filled, after which the exchange will not fill an order
+TERMINAL_ORDER_STATUSES = frozenset({'cancelled', 'canceled', 'expired', 'rejected'})
+
+# Seconds between periodic performance summaries
+SUMMARY_INTERVAL = 600
+
+def _run_concurrently(func: Callable, calls: List[tuple]) -> List[Tuple[Any, Optional[Exception]]]:
+    """Call func once per argument tuple on a thread pool.
+    
+    Exchange requests are independent and RTT-bound, so issuing them together costs
+    about one round trip instead of one per call. Returns (result, error) pairs in
+    the order of calls.
+    """
+    if not calls:
+        return []
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=min(32, len(calls))) as executor:
+        futures = [executor.submit(func, *args) for args in calls]
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+    return results
+
+@dataclass(**DATACLASS_SLOTS)
 class GridLevel:
     """Represents a grid level with buy/sell orders."""
     level: int
@@ -33,12 +58,27 @@ class GridTradingBot:
         self.config = config
         self.security_manager = SecurityManager(config.ENCRYPTION_KEY)
         self.api_client = APIClient(config, self.security_manager)
+        # Keep a pooled connection for every order a grid burst can have in flight
+        self.api_client.configure_pool(pool_maxsize=max(32, 2 * config.GRID_LEVELS))
         self.risk_manager = RiskManager(config.get_trading_config())
         
         self.grid_levels: List[GridLevel] = []
         self.active_orders: Dict[str, Dict] = {}
+        # Grid level and side of every order placed by the bot, keyed by order id
+        self._order_index: Dict[str, Tuple[GridLevel, str]] = {}
+        # Follow-up orders queued by fills, placed together once per cycle
+        self._pending_followups: List[Tuple[GridLevel, str, float, float]] = []
         self.is_running = False
-        self.session_start = time.time()
+        # Set by stop(); sticky, so a signal during startup keeps the bot from trading
+        self._stop_requested = False
+        # Event loop and stop event of the running session, so stop() can wake it from any thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self.session_start = time.monotonic_ns()
+        # Monotonic deadline for the next periodic performance summary
+        self._next_summary = time.monotonic() + SUMMARY_INTERVAL
+        # (monotonic fetch time, price) of the last market price lookup
+        self._price_cache: Tuple[float, float] = (0.0, 0.0)
         
         # Performance tracking
         self.total_profit = 0.0
@@ -70,7 +110,7 @@ class GridTradingBot:
             logger.info(f"Account balances: {balances}")
             
             # Get current market price
-            current_price = self.api_client.get_market_price(self.config.TRADING_PAIR)
+            current_price = self._price()
             logger.info(f"Current {self.config.TRADING_PAIR} price: {current_price:.6f}")
             
             # Initialize grid levels
@@ -83,6 +123,17 @@ class GridTradingBot:
             logger.error(f"Initialization failed: {e}")
             return False
     
+    def _price(self) -> float:
+        """Get the market price, reusing the last lookup for PRICE_CACHE_TTL seconds."""
+        fetched_at, price = self._price_cache
+        now = time.monotonic()
+        if fetched_at and now - fetched_at < self.config.PRICE_CACHE_TTL:
+            return price
+        
+        price = self.api_client.get_market_price(self.config.TRADING_PAIR)
+        self._price_cache = (now, price)
+        return price
+    
     def _initialize_grid(self, current_price: float):
         """Initialize grid levels around current price."""
         try:
@@ -111,73 +162,23 @@ class GridTradingBot:
         try:
             logger.info("Placing grid orders...")
             
+            # Calculate position size (the same for every level at this price)
+            position_size = self.risk_manager.calculate_position_size(
+                current_price, self.config.RISK_PER_TRADE
+            )
+            
+            if position_size <= 0:
+                logger.warning("Skipping grid orders - insufficient position size")
+                return
+            
+            order_requests = []
             for level in self.grid_levels:
-                # Calculate position size
-                position_size = self.risk_manager.calculate_position_size(
-                    current_price, self.config.RISK_PER_TRADE
-                )
-                
-                if position_size <= 0:
-                    logger.warning(f"Skipping level {level.level} - insufficient position size")
-                    continue
-                
-                # Place buy order
                 if not level.buy_order_id and not level.buy_filled:
-                    try:
-                        buy_order = self.api_client.place_order(
-                            self.config.TRADING_PAIR,
-                            "buy",
-                            "limit",
-                            position_size,
-                            level.buy_price
-                        )
-                        level.buy_order_id = buy_order.get('id')
-                        self.active_orders[level.buy_order_id] = buy_order
-                        
-                        # Add position to risk manager
-                        position = Position(
-                            id=level.buy_order_id,
-                            side="buy",
-                            quantity=position_size,
-                            price=level.buy_price,
-                            timestamp=time.time(),
-                            status="open"
-                        )
-                        self.risk_manager.add_position(position)
-                        
-                        logger.info(f"Placed buy order at level {level.level}: {position_size} @ {level.buy_price}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to place buy order at level {level.level}: {e}")
-                
-                # Place sell order
+                    order_requests.append((level, "buy", position_size, level.buy_price))
                 if not level.sell_order_id and not level.sell_filled:
-                    try:
-                        sell_order = self.api_client.place_order(
-                            self.config.TRADING_PAIR,
-                            "sell",
-                            "limit",
-                            position_size,
-                            level.sell_price
-                        )
-                        level.sell_order_id = sell_order.get('id')
-                        self.active_orders[level.sell_order_id] = sell_order
-                        
-                        # Add position to risk manager
-                        position = Position(
-                            id=level.sell_order_id,
-                            side="sell",
-                            quantity=position_size,
-                            price=level.sell_price,
-                            timestamp=time.time(),
-                            status="open"
-                        )
-                        self.risk_manager.add_position(position)
-                        
-                        logger.info(f"Placed sell order at level {level.level}: {position_size} @ {level.sell_price}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to place sell order at level {level.level}: {e}")
+                    order_requests.append((level, "sell", position_size, level.sell_price))
+            
+            self._place_orders(order_requests)
             
             logger.info(f"Grid orders placed. Active orders: {len(self.active_orders)}")
             
@@ -185,29 +186,58 @@ class GridTradingBot:
             logger.error(f"Failed to place grid orders: {e}")
             raise
     
+    def _place_orders(self, order_requests: List[Tuple[GridLevel, str, float, float]]):
+        """Place (level, side, quantity, price) orders concurrently and record the ones that succeed."""
+        # Orders are independent, so submit them all at once instead of one RTT each
+        results = _run_concurrently(self.api_client.place_order, [
+            (self.config.TRADING_PAIR, side, "limit", quantity, price)
+            for _, side, quantity, price in order_requests
+        ])
+        
+        # Shared state is only touched here, on the calling thread
+        for (level, side, quantity, price), (order, error) in zip(order_requests, results):
+            if error is not None:
+                logger.error(f"Failed to place {side} order at level {level.level}: {error}")
+                continue
+            
+            self._record_grid_order(level, side, order, quantity, price)
+            logger.info(f"Placed {side} order at level {level.level}: {quantity} @ {price}")
+    
+    def _record_grid_order(self, level: GridLevel, side: str, order: Dict, quantity: float, price: float):
+        """Attach a placed order to its grid level and register it with the risk manager."""
+        order_id = order.get('id')
+        if side == "buy":
+            level.buy_order_id = order_id
+        else:
+            level.sell_order_id = order_id
+        self.active_orders[order_id] = order
+        self._order_index[order_id] = (level, side)
+        
+        # Add position to risk manager
+        position = Position(
+            id=order_id,
+            side=side,
+            quantity=quantity,
+            price=price,
+            timestamp=time.monotonic_ns(),
+            status="open"
+        )
+        self.risk_manager.add_position(position)
+    
     def manage_positions(self, current_price: float):
         """Monitor and manage open positions."""
         try:
             # Check for filled orders
             open_orders = self.api_client.get_open_orders(self.config.TRADING_PAIR)
-            filled_orders = []
-            
-            for order_id in list(self.active_orders.keys()):
-                order_found = False
-                for open_order in open_orders:
-                    if open_order.get('id') == order_id:
-                        order_found = True
-                        break
-                
-                if not order_found:
-                    # Order might be filled, check status
-                    try:
-                        order_status = self.api_client.get_order_status(order_id)
-                        if order_status.get('status') == 'filled':
-                            filled_orders.append(order_status)
-                            self._handle_filled_order(order_status)
-                    except Exception as e:
-                        logger.error(f"Failed to check order status for {order_id}: {e}")
+            open_ids = {open_order.get('id') for open_order in open_orders}
+            
+            # Orders no longer open might be filled; look them all up in one pass
+            missing = list(self.active_orders.keys() - open_ids)
+            for order_status in self.api_client.get_orders_by_ids(missing):
+                self._on_order_update(order_status)
+            
+            # Re-open the grid behind this cycle's fills in one burst
+            self._place_followup_orders()
             
             # Check stop loss conditions
             positions_to_close = self.risk_manager.check_stop_loss(current_price)
@@ -215,13 +245,37 @@ class GridTradingBot:
                 self._close_position(position_id, "stop_loss")
             
             # Update grid levels based on filled orders
-            self._update_grid_levels()
+            self._update_grid_levels(current_price)
             
         except Exception as e:
             logger.error(f"Failed to manage positions: {e}")
     
+    def _on_order_update(self, order_data: Dict):
+        """Apply an order status update, whether polled or pushed by the exchange."""
+        status = order_data.get('status')
+        if status == 'filled':
+            self._handle_filled_order(order_data)
+        elif status in TERMINAL_ORDER_STATUSES:
+            self._forget_order(order_data.get('id'), status)
+    
+    def _forget_order(self, order_id: str, status: str):
+        """Stop tracking an order the exchange closed without a fill."""
+        self.risk_manager.update_position(order_id, 'cancelled')
+        self.active_orders.pop(order_id, None)
+        
+        entry = self._order_index.pop(order_id, None)
+        if entry is not None:
+            level, side = entry
+            # Free the level's slot so place_grid_orders can re-arm it
+            if side == "buy":
+                level.buy_order_id = None
+            else:
+                level.sell_order_id = None
+        
+        logger.info(f"Order {order_id} closed by exchange: {status}")
+    
     def _handle_filled_order(self, order_data: Dict):
-        """Handle a filled order and place corresponding order."""
+        """Handle a filled order and queue the corresponding order."""
         try:
             order_id = order_data.get('id')
             side = order_data.get('side')
@@ -236,108 +290,54 @@ class GridTradingBot:
                 del self.active_orders[order_id]
             
             # Update grid level
-            for level in self.grid_levels:
-                if level.buy_order_id == order_id:
+            entry = self._order_index.pop(order_id, None)
+            if entry is not None:
+                level, level_side = entry
+                if level_side == "buy":
                     level.buy_filled = True
                     level.buy_order_id = None
-                    self._place_corresponding_sell_order(level, quantity, fill_price)
-                    break
-                elif level.sell_order_id == order_id:
+                    self._queue_followup_order(level, "sell", quantity, fill_price * (1 + self.config.PROFIT_TARGET_PERCENT))
+                else:
                     level.sell_filled = True
                     level.sell_order_id = None
-                    self._place_corresponding_buy_order(level, quantity, fill_price)
-                    break
+                    self._queue_followup_order(level, "buy", quantity, fill_price * (1 - self.config.PROFIT_TARGET_PERCENT))
             
             logger.info(f"Handled filled {side} order: {quantity} @ {fill_price}")
             
         except Exception as e:
             logger.error(f"Failed to handle filled order: {e}")
     
-    def _place_corresponding_sell_order(self, level: GridLevel, quantity: float, buy_price: float):
-        """Place a sell order after a buy order is filled."""
-        try:
-            # Calculate sell price with profit target
-            sell_price = buy_price * (1 + self.config.PROFIT_TARGET_PERCENT)
-            
-            sell_order = self.api_client.place_order(
-                self.config.TRADING_PAIR,
-                "sell",
-                "limit",
-                quantity,
-                sell_price
-            )
-            
-            level.sell_order_id = sell_order.get('id')
-            self.active_orders[level.sell_order_id] = sell_order
-            
-            # Add to risk manager
-            position = Position(
-                id=level.sell_order_id,
-                side="sell",
-                quantity=quantity,
-                price=sell_price,
-                timestamp=time.time(),
-                status="open"
-            )
-            self.risk_manager.add_position(position)
-            
-            logger.info(f"Placed corresponding sell order: {quantity} @ {sell_price}")
-            
-        except Exception as e:
-            logger.error(f"Failed to place corresponding sell order: {e}")
+    def _queue_followup_order(self, level: GridLevel, side: str, quantity: float, price: float):
+        """Queue the order that takes profit on a fill; placed by _place_followup_orders."""
+        self._pending_followups.append((level, side, quantity, price))
     
-    def _place_corresponding_buy_order(self, level: GridLevel, quantity: float, sell_price: float):
-        """Place a buy order after a sell order is filled."""
+    def _place_followup_orders(self):
+        """Place every queued follow-up order together."""
+        if not self._pending_followups:
+            return
+        
+        followups, self._pending_followups = self._pending_followups, []
         try:
-            # Calculate buy price with profit target
-            buy_price = sell_price * (1 - self.config.PROFIT_TARGET_PERCENT)
-            
-            buy_order = self.api_client.place_order(
-                self.config.TRADING_PAIR,
-                "buy",
-                "limit",
-                quantity,
-                buy_price
-            )
-            
-            level.buy_order_id = buy_order.get('id')
-            self.active_orders[level.buy_order_id] = buy_order
-            
-            # Add to risk manager
-            position = Position(
-                id=level.buy_order_id,
-                side="buy",
-                quantity=quantity,
-                price=buy_price,
-                timestamp=time.time(),
-                status="open"
-            )
-            self.risk_manager.add_position(position)
-            
-            logger.info(f"Placed corresponding buy order: {quantity} @ {buy_price}")
-            
+            self._place_orders(followups)
         except Exception as e:
-            logger.error(f"Failed to place corresponding buy order: {e}")
+            logger.error(f"Failed to place follow-up orders: {e}")
     
-    def _update_grid_levels(self):
+    def _update_grid_levels(self, current_price: float):
         """Update grid levels based on market conditions."""
         try:
-            current_price = self.api_client.get_market_price(self.config.TRADING_PAIR)
+            # Levels with both orders filled can be re-armed around the current price
+            reset_levels = [level for level in self.grid_levels if level.buy_filled and level.sell_filled]
+            if not reset_levels:
+                return
             
-            # Check if we need to adjust grid levels
-            for level in self.grid_levels:
-                # If both orders are filled, we can place new orders
-                if level.buy_filled and level.sell_filled:
-                    # Reset level
-                    level.buy_filled = False
-                    level.sell_filled = False
-                    
-                    # Recalculate prices based on current market
-                    buy_prices, sell_prices = self.risk_manager.get_optimal_grid_levels(current_price)
-                    level.buy_price = buy_prices[level.level - 1]
-                    level.sell_price = sell_prices[level.level - 1]
-                    
-                    logger.info(f"Updated grid level {level.level}: buy={level.buy_price}, sell={level.sell_price}")
+            buy_prices, sell_prices = self.risk_manager.get_optimal_grid_levels(current_price)
+            for level in reset_levels:
+                level.buy_filled = False
+                level.sell_filled = False
+                level.buy_price = buy_prices[level.level - 1]
+                level.sell_price = sell_prices[level.level - 1]
+                
+                logger.info(f"Updated grid level {level.level}: buy={level.buy_price}, sell={level.sell_price}")
             
         except Exception as e:
             logger.error(f"Failed to update grid levels: {e}")
@@ -355,6 +355,7 @@ class GridTradingBot:
                 # Remove from active orders
                 if position_id in self.active_orders:
                     del self.active_orders[position_id]
+                self._order_index.pop(position_id, None)
             
         except Exception as e:
             logger.error(f"Failed to close position {position_id}: {e}")
@@ -363,46 +364,94 @@ class GridTradingBot:
         """Main execution loop."""
         try:
             logger.info("Starting grid trading bot...")
+            if self._stop_requested:
+                logger.info("Stop requested before trading started")
+                return
             self.is_running = True
             
             # Place initial grid orders
-            current_price = self.api_client.get_market_price(self.config.TRADING_PAIR)
+            current_price = self._price()
             self.place_grid_orders(current_price)
             
             # Main loop
-            while self.is_running:
-                try:
-                    # Check if we should continue trading
-                    if not self.risk_manager.should_continue_trading():
-                        logger.warning("Risk limits exceeded, stopping trading")
-                        break
-                    
-                    # Get current market price
-                    current_price = self.api_client.get_market_price(self.config.TRADING_PAIR)
-                    
-                    # Manage positions
-                    self.manage_positions(current_price)
-                    
-                    # Display performance summary every 10 minutes
-                    if int(time.time() - self.session_start) % 600 == 0:
-                        self._display_summary()
-                    
-                    # Sleep
-                    time.sleep(self.config.CHECK_INTERVAL)
-                    
-                except KeyboardInterrupt:
-                    logger.info("Received interrupt signal, stopping bot...")
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main loop: {e}")
-                    time.sleep(self.config.RETRY_DELAY)
-            
-            # Cleanup
-            self._cleanup()
+            run_async(self._run_event_loop())
             
+        except KeyboardInterrupt:
+            logger.info("Received interrupt signal, stopping bot...")
         except Exception as e:
             logger.error(f"Bot execution failed: {e}")
-            self._cleanup()
+        
+        # Cleanup
+        self._cleanup()
+    
+    async def _run_event_loop(self):
+        """Run the price producer and position consumer until one of them stops or stop() is called."""
+        # Only the freshest price matters, so the queue holds a single tick
+        price_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        # Publish the loop only once the event exists, so stop() never sees one without the other
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stop_requested:
+            # stop() ran before the loop was published and could not wake it
+            self._stop_event.set()
+        tasks = [
+            asyncio.ensure_future(self._stop_event.wait()),
+            asyncio.ensure_future(self._price_producer(price_queue)),
+            asyncio.ensure_future(self._position_consumer(price_queue)),
+        ]
+        
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.is_running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop = None
+    
+    async def _price_producer(self, price_queue: asyncio.Queue):
+        """Poll the exchange for the market price and publish each tick to the queue."""
+        loop = asyncio.get_running_loop()
+        
+        while self.is_running:
+            try:
+                current_price = await loop.run_in_executor(None, self._price)
+                # Drop the stale tick if the consumer has not picked it up yet
+                if price_queue.full():
+                    price_queue.get_nowait()
+                price_queue.put_nowait(current_price)
+                
+                await asyncio.sleep(self.config.CHECK_INTERVAL)
+                
+            except Exception as e:
+                logger.error(f"Error fetching market price: {e}")
+                await asyncio.sleep(self.config.RETRY_DELAY)
+    
+    async def _position_consumer(self, price_queue: asyncio.Queue):
+        """Manage positions for every price tick."""
+        loop = asyncio.get_running_loop()
+        
+        while self.is_running:
+            current_price = await price_queue.get()
+            
+            try:
+                # Check if we should continue trading
+                if not self.risk_manager.should_continue_trading():
+                    logger.warning("Risk limits exceeded, stopping trading")
+                    break
+                
+                # Manage positions
+                await loop.run_in_executor(None, self.manage_positions, current_price)
+                
+                # Display performance summary every 10 minutes
+                now = time.monotonic()
+                if now >= self._next_summary:
+                    self._display_summary()
+                    self._next_summary = now + SUMMARY_INTERVAL
+                
+            except Exception as e:
+                logger.error(f"Error in main loop: {e}")
+                await asyncio.sleep(self.config.RETRY_DELAY)
     
     def _display_summary(self):
         """Display performance summary."""
@@ -417,12 +466,11 @@ class GridTradingBot:
         try:
             logger.info("Cleaning up...")
             
-            # Cancel all open orders
-            for order_id in list(self.active_orders.keys()):
-                try:
-                    self.api_client.cancel_order(order_id)
-                except Exception as e:
-                    logger.error(f"Failed to cancel order {order_id}: {e}")
+            # Cancel all open orders in one batch
+            results = self.api_client.cancel_orders_batch(list(self.active_orders.keys()))
+            for order_id, cancelled in results.items():
+                if not cancelled:
+                    logger.error(f"Failed to cancel order {order_id}")
             
             # Display final summary
             self._display_summary()
@@ -436,4 +484,13 @@ class GridTradingBot:
     def stop(self):
         """Stop the bot gracefully."""
         logger.info("Stopping bot...")
-        self.is_running = False 
\ No newline at end of file
+        self._stop_requested = True
+        self.is_running = False
+        
+        # Wake the event loop so pending sleeps are cancelled instead of running out
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # The loop already closed
@@ -4,6 +4,7 @@ Provides secure hardware wallet integration for Ledger devices.
 """
 
 import logging
+import struct
 from typing import Optional, Dict, Any
 from solders.pubkey import Pubkey as PublicKey
 from solders.transaction import Transaction
@@ -29,6 +30,16 @@ class HardwareWalletManager:
         self.public_key = None
         self.connected = False
         
+        # The path never changes, so encode it and the static APDU prefixes once
+        self._encoded_path = self._encode_derivation_path()
+        path_prefix = bytes([len(self._encoded_path)]) + self._encoded_path
+        # CLA=0xE0, INS=0x01 (GET_PUBLIC_KEY), P1=0x00, P2=0x00
+        self._get_public_key_apdu = bytes([0xE0, 0x01, 0x00, 0x00]) + path_prefix
+        # CLA=0xE0, INS=0x02 (SIGN_TRANSACTION), P1=0x00, P2=0x00
+        self._sign_apdu_header = bytes([0xE0, 0x02, 0x00, 0x00]) + path_prefix
+        # Reused for every signing APDU; grown if a message does not fit
+        self._apdu_buf = bytearray(4096)
+        
         logger.info(f"Initializing {device_type} hardware wallet with path: {derivation_path}")
         
     def connect(self) -> bool:
@@ -83,16 +94,8 @@ class HardwareWalletManager:
     def _get_ledger_public_key(self) -> Optional[PublicKey]:
         """Get public key from Ledger device."""
         try:
-            # Solana app APDU command to get public key
-            # CLA=0xE0, INS=0x01 (GET_PUBLIC_KEY), P1=0x00, P2=0x00
-            apdu = bytearray([0xE0, 0x01, 0x00, 0x00])
-            
-            # Add derivation path length and path
-            path_bytes = self._encode_derivation_path()
-            apdu.append(len(path_bytes))
-            apdu.extend(path_bytes)
-            
-            response = self.client.exchange(bytes(apdu))
+            # Solana app APDU command to get public key (header and path are precomputed)
+            response = self.client.exchange(self._get_public_key_apdu)
             
             # Parse response (first 32 bytes are the public key)
             if len(response) >= 32:
@@ -109,16 +112,16 @@ class HardwareWalletManager:
         """Encode derivation path for Ledger communication."""
         try:
             # Parse derivation path like "44'/501'/0'/0'"
-            path_parts = self.derivation_path.replace("'", "").split("/")
             path_ints = []
             
-            for part in path_parts:
-                if part.isdigit():
+            for part in self.derivation_path.split("/"):
+                index = part.rstrip("'")
+                if index.isdigit():
                     # Add hardened bit (0x80000000) for hardened derivation
-                    if "'" in self.derivation_path.split("/")[len(path_ints)]:
-                        path_ints.append(int(part) | 0x80000000)
+                    if part.endswith("'"):
+                        path_ints.append(int(index) | 0x80000000)
                     else:
-                        path_ints.append(int(part))
+                        path_ints.append(int(index))
             
             # Encode as bytes (4 bytes per path element, big endian)
             encoded = bytearray()
@@ -181,23 +184,24 @@ class HardwareWalletManager:
             message = transaction.compile_message()
             message_bytes = message.serialize()
             
-            # Solana app APDU command to sign transaction
-            # CLA=0xE0, INS=0x02 (SIGN_TRANSACTION), P1=0x00, P2=0x00
-            apdu = bytearray([0xE0, 0x02, 0x00, 0x00])
+            # Solana app APDU command to sign transaction: precomputed header and path,
+            # 2-byte message length, then the message, written into the reusable buffer
+            header_len = len(self._sign_apdu_header)
+            total_len = header_len + 2 + len(message_bytes)
+            if total_len > len(self._apdu_buf):
+                self._apdu_buf = bytearray(total_len)
             
-            # Add derivation path
-            path_bytes = self._encode_derivation_path()
-            apdu.append(len(path_bytes))
-            apdu.extend(path_bytes)
-            
-            # Add message length and data
-            apdu.extend(len(message_bytes).to_bytes(2, 'big'))
-            apdu.extend(message_bytes)
+            apdu = self._apdu_buf
+            apdu[:header_len] = self._sign_apdu_header
+            struct.pack_into('>H', apdu, header_len, len(message_bytes))
+            apdu[header_len + 2:total_len] = message_bytes
             
             # Request user confirmation on device
             logger.info("Please confirm transaction on your Ledger device...")
-            
-            response = self.client.exchange(bytes(apdu))
+
+            # ledgerblue transports concatenate and hex-encode the APDU, so they get
+            # an immutable bytes copy of the used part of the buffer
+            response = self.client.exchange(bytes(memoryview(apdu)[:total_len]))
             
             # Parse signature from response
             if len(response) >= 64:
@@ -18,21 +18,30 @@ import sys
 import os
 import signal
 import argparse
+import threading
+import _thread
 import time
 from datetime import datetime
 import logging
+from typing import TYPE_CHECKING
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import Config
-from grid_trading_bot import GridTradingBot
-from dex_grid_bot import DEXGridTradingBot
 from utils import (
     setup_logging, display_welcome_banner, display_config_summary,
     display_performance_summary, check_system_resources
 )
 
+if TYPE_CHECKING:
+    from config import Config
+
+# Config and the bot modules are imported where they are needed, so --help and
+# argument errors don't pay for loading the trading stack.
+
+# Accepted values for --log-level
+_LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
 # Global bot instance for signal handling
 bot_instance = None
 
@@ -58,11 +67,8 @@ def validate_environment():
     
     # Check required environment variables
     required_vars = ['API_KEY', 'API_SECRET']
-    missing_vars = []
-    
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
+    env = os.environ
+    missing_vars = [var for var in required_vars if not env.get(var)]
     
     if missing_vars:
         print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
@@ -85,24 +91,57 @@ def validate_environment():
     
     print("✅ Environment validation completed")
 
+def _wait_for_shutdown_signal(signals):
+    """Handle shutdown signals on a dedicated thread.
+    
+    The signals are blocked everywhere else, so shutdown runs as ordinary code
+    here instead of interrupting the trading loop at an arbitrary point.
+    """
+    signum = signal.sigwait(signals)
+    print(f"\n{chr(27)}[33mReceived signal {signum}. Shutting down gracefully...{chr(27)}[0m")
+    
+    if bot_instance:
+        # The run loop sees this, exits and cleans up on the main thread
+        bot_instance.stop()
+    else:
+        # Nothing is trading yet; interrupt startup as Ctrl+C normally would
+        _thread.interrupt_main()
+    
+    # A second signal means the graceful path is stuck
+    signal.sigwait(signals)
+    print("⚠️  Forcing exit")
+    os._exit(1)
+
 def setup_signal_handlers():
     """Setup signal handlers for graceful shutdown."""
+    if hasattr(signal, 'pthread_sigmask'):
+        # Must run before any other thread starts so every thread inherits the mask
+        signals = {signal.SIGINT, signal.SIGTERM}  # Ctrl+C, termination signal
+        signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+        threading.Thread(
+            target=_wait_for_shutdown_signal, args=(signals,), name="signal-waiter", daemon=True
+        ).start()
+        return
+    
+    # Windows has no pthread signal APIs
     signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
     
-    if hasattr(signal, 'SIGBREAK'):  # Windows
+    if hasattr(signal, 'SIGBREAK'):
         signal.signal(signal.SIGBREAK, signal_handler)
 
-def run_backtest(config: Config):
+def run_backtest(config: 'Config'):
     """Run backtest mode (placeholder for future implementation)."""
     print("🧪 Backtest mode not yet implemented")
     print("This feature will be available in future versions")
     return False
 
-def run_dry_run(config: Config):
+def run_dry_run(config: 'Config'):
     """Run in dry-run mode (simulation without real trades)."""
     print("🧪 Running in DRY-RUN mode (no real trades will be executed)")
     
+    from grid_trading_bot import GridTradingBot
+    
     # Modify config for dry run
     config.BASE_URL = "https://api.testnet.example.com"  # Use testnet
     
@@ -124,7 +163,7 @@ def run_dry_run(config: Config):
         print("❌ Dry run initialization failed")
         return False
 
-def run_live_trading(config: Config):
+def run_live_trading(config: 'Config'):
     """Run the bot in live trading mode."""
     global bot_instance
     
@@ -134,9 +173,11 @@ def run_live_trading(config: Config):
         # Determine trading mode
         if config.PRIVATE_KEY:
             print("🔗 DEX Mode: Using wallet for decentralized trading")
+            from dex_grid_bot import DEXGridTradingBot
             bot_instance = DEXGridTradingBot(config)
         else:
             print("🏢 CEX Mode: Using centralized exchange API")
+            from grid_trading_bot import GridTradingBot
             bot_instance = GridTradingBot(config)
         
         if not bot_instance.initialize():
@@ -163,8 +204,8 @@ def run_live_trading(config: Config):
         if bot_instance:
             bot_instance.stop()
 
-def main():
-    """Main execution function."""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
     parser = argparse.ArgumentParser(
         description="Solana Grid Trading Bot - Maximum Profitability & Security",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -197,12 +238,19 @@ Examples:
     
     parser.add_argument(
         '--log-level',
-        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        choices=_LOG_LEVELS,
         default='INFO',
         help='Set logging level'
     )
     
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main execution function."""
+    args = _build_parser().parse_args()
+    
+    # Importing config loads .env, which validate_environment below relies on
+    from config import Config
     
     # Display welcome banner
     display_welcome_banner()
@@ -7,13 +7,31 @@ existing micro-grid strategy (P1) and dynamic position sizing (P2).
 """
 
 import time
+import heapq
 import logging
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
-from collections import defaultdict
+from collections import OrderedDict
+from itertools import chain
+from operator import attrgetter
 
+from utils import DATACLASS_SLOTS
 
-@dataclass
+# Most recent analyses kept by MarketAnalyzer before the oldest is evicted
+ANALYSIS_CACHE_SIZE = 128
+
+# Config settings read by MarketAnalyzer, with defaults for configs that lack them
+_ANALYZER_DEFAULTS = {
+    'MARKET_ANALYSIS_CACHE_DURATION': 30,
+    'MIN_VOLUME_STRENGTH': 0.3,
+    'MIN_DEPTH_QUALITY': 0.3,
+    'VOLUME_ADJUSTMENT_TOLERANCE': 0.02,
+}
+_read_analyzer_settings = attrgetter(*_ANALYZER_DEFAULTS)
+
+
+@dataclass(**DATACLASS_SLOTS)
 class VolumeLevel:
     """Represents a significant volume level in the order book"""
     price: float
@@ -24,9 +42,9 @@ class VolumeLevel:
     price_distance: float  # Distance from current price (%)
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class MarketDepthAnalysis:
-    """Complete market depth analysis result"""
+    """Complete market depth analysis result (shared through the cache, so immutable)"""
     current_price: float
     bid_levels: List[VolumeLevel]
     ask_levels: List[VolumeLevel]
@@ -51,11 +69,15 @@ class MarketAnalyzer:
         """
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self._cache = {}
-        self._cache_duration = getattr(config, 'MARKET_ANALYSIS_CACHE_DURATION', 30)
-        self._min_volume_strength = getattr(config, 'MIN_VOLUME_STRENGTH', 0.3)
-        self._min_depth_quality = getattr(config, 'MIN_DEPTH_QUALITY', 0.3)
-        self._volume_adjustment_tolerance = getattr(config, 'VOLUME_ADJUSTMENT_TOLERANCE', 0.02)
+        self._cache = OrderedDict()
+        
+        # Config defines all of these; anything else gets the defaults field by field
+        try:
+            settings = _read_analyzer_settings(config)
+        except AttributeError:
+            settings = tuple(getattr(config, name, default) for name, default in _ANALYZER_DEFAULTS.items())
+        (self._cache_duration, self._min_volume_strength,
+         self._min_depth_quality, self._volume_adjustment_tolerance) = settings
         
     def analyze_market_depth(self, order_book_data: Dict, current_price: float) -> Optional[MarketDepthAnalysis]:
         """
@@ -68,15 +90,6 @@ class MarketAnalyzer:
         Returns:
             MarketDepthAnalysis object or None if analysis fails
         """
-        cache_key = f"depth_{hash(str(order_book_data))}_{current_price}"
-        
-        # Check cache first
-        if cache_key in self._cache:
-            cached_result, timestamp = self._cache[cache_key]
-            if time.time() - timestamp < self._cache_duration:
-                self.logger.debug("Returning cached market depth analysis")
-                return cached_result
-                
         try:
             # Parse order book data
             bids = order_book_data.get('bids', [])
@@ -86,6 +99,23 @@ class MarketAnalyzer:
                 self.logger.warning("Empty order book data received")
                 return None
                 
+            # Key on every level as tuples rather than stringifying the book; any
+            # change to an interior level must miss the cache
+            cache_key = (tuple(map(tuple, bids)), tuple(map(tuple, asks)), round(current_price, 6))
+            
+            # One clock read serves the cache check, the result and the cache entry
+            now = time.time()
+            
+            # Check cache first
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                cached_result, timestamp = cached
+                if now - timestamp < self._cache_duration:
+                    self._cache.move_to_end(cache_key)
+                    self.logger.debug("Returning cached market depth analysis")
+                    return cached_result
+                # Expired; the fresh analysis below replaces it
+                
             # Analyze each side of the order book
             bid_levels = self._analyze_order_book_side(bids, 'buy', current_price, max_levels=10)
             ask_levels = self._analyze_order_book_side(asks, 'sell', current_price, max_levels=10)
@@ -103,17 +133,17 @@ class MarketAnalyzer:
                 volume_imbalance=volume_imbalance,
                 spread_percent=spread_percent,
                 depth_quality=depth_quality,
-                timestamp=time.time()
+                timestamp=now
             )
             
             # Cache the result
-            self._cache[cache_key] = (analysis, time.time())
-            
-            # Clean old cache entries
-            self._clean_cache()
+            self._cache[cache_key] = (analysis, now)
+            self._cache.move_to_end(cache_key)
+            if len(self._cache) > ANALYSIS_CACHE_SIZE:
+                self._cache.popitem(last=False)
             
-            self.logger.debug(f"Market depth analysis completed: quality={depth_quality:.3f}, "
-                            f"imbalance={volume_imbalance:.3f}, spread={spread_percent:.4f}%")
+            self.logger.debug("Market depth analysis completed: quality=%.3f, imbalance=%.3f, spread=%.4f%%",
+                              depth_quality, volume_imbalance, spread_percent)
             
             return analysis
             
@@ -137,38 +167,43 @@ class MarketAnalyzer:
         if not orders:
             return []
             
-        # Group orders into 0.1% price buckets
-        price_buckets = defaultdict(float)
+        min_strength = self._min_volume_strength
+        
+        # Group orders into 0.1% price buckets. Everything is expressed as a ratio to
+        # the current price, so each order costs one multiply for both the distance
+        # filter and its bucket key.
+        price_buckets = {}
+        inv_price = 1.0 / current_price
         
         for order in orders:
             if len(order) < 2:
                 continue
                 
             try:
-                price = float(order[0])
+                price_ratio = float(order[0]) * inv_price
                 volume = float(order[1])
                 
                 # Skip orders too far from current price (>5%)
-                price_distance = abs(price - current_price) / current_price
-                if price_distance > 0.05:
+                if abs(price_ratio - 1.0) > 0.05:
                     continue
                     
                 # Determine bucket (0.1% increments)
-                bucket_key = round(price / current_price, 3)
-                price_buckets[bucket_key] += volume
+                bucket_key = round(price_ratio, 3)
+                price_buckets[bucket_key] = price_buckets.get(bucket_key, 0.0) + volume
                 
             except (ValueError, IndexError) as e:
                 self.logger.warning(f"Invalid order data: {order}, error: {e}")
                 continue
                 
         # Convert buckets to VolumeLevel objects
+        max_volume = max(price_buckets.values()) if price_buckets else 1.0
         volume_levels = []
         for bucket_price_ratio, total_volume in price_buckets.items():
             bucket_price = bucket_price_ratio * current_price
-            price_distance = abs(bucket_price - current_price) / current_price
+            price_distance = abs(bucket_price_ratio - 1.0)
             
             # Calculate strength score (0-1)
-            volume_score = min(total_volume / max(price_buckets.values()), 1.0) if price_buckets.values() else 0
+            volume_score = min(total_volume / max_volume, 1.0)
             proximity_score = max(0, 1.0 - (price_distance * 20))  # Closer = stronger
             strength = (volume_score * 0.7) + (proximity_score * 0.3)
             
@@ -181,15 +216,13 @@ class MarketAnalyzer:
                 price_distance=price_distance
             ))
             
-        # Sort by strength and assign ranks
-        volume_levels.sort(key=lambda x: x.strength, reverse=True)
-        for i, level in enumerate(volume_levels[:max_levels]):
+        # Rank only the strongest max_levels; the rest would be discarded anyway
+        top_levels = heapq.nlargest(max_levels, volume_levels, key=attrgetter('strength'))
+        for i, level in enumerate(top_levels):
             level.depth_rank = i + 1
             
-        # Filter by minimum strength
-        strong_levels = [level for level in volume_levels if level.strength >= self._min_volume_strength]
-        
-        return strong_levels[:max_levels]
+        # Filter by minimum strength (strong levels are a prefix of the ranking)
+        return [level for level in top_levels if level.strength >= min_strength]
         
     def _calculate_volume_imbalance(self, bid_levels: List[VolumeLevel], ask_levels: List[VolumeLevel]) -> float:
         """
@@ -198,13 +231,18 @@ class MarketAnalyzer:
         Returns:
             Float between -1 and +1, where negative = more sell pressure
         """
-        total_bid_volume = sum(level.volume for level in bid_levels)
-        total_ask_volume = sum(level.volume for level in ask_levels)
+        total_bid_volume = 0.0
+        for level in bid_levels:
+            total_bid_volume += level.volume
+        total_ask_volume = 0.0
+        for level in ask_levels:
+            total_ask_volume += level.volume
         
-        if total_bid_volume + total_ask_volume == 0:
+        total_volume = total_bid_volume + total_ask_volume
+        if total_volume == 0:
             return 0.0
             
-        imbalance = (total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume)
+        imbalance = (total_bid_volume - total_ask_volume) / total_volume
         return max(-1.0, min(1.0, imbalance))
         
     def _calculate_spread_percent(self, bids: List, asks: List, current_price: float) -> float:
@@ -235,13 +273,13 @@ class MarketAnalyzer:
         level_score = min(total_levels / 10, 1.0)  # Optimal around 10 total levels
         
         # Volume distribution score
-        all_levels = bid_levels + ask_levels
-        if not all_levels:
+        if not total_levels:
             return 0.0
             
-        strengths = [level.strength for level in all_levels]
-        avg_strength = sum(strengths) / len(strengths)
-        strength_score = avg_strength
+        strength_sum = 0.0
+        for level in chain(bid_levels, ask_levels):
+            strength_sum += level.strength
+        strength_score = strength_sum / total_levels
         
         # Order book depth score
         total_orders = len(raw_bids) + len(raw_asks)
@@ -251,16 +289,6 @@ class MarketAnalyzer:
         quality = (level_score * 0.4) + (strength_score * 0.4) + (depth_score * 0.2)
         return min(max(quality, 0.0), 1.0)
         
-    def _clean_cache(self):
-        """Remove expired cache entries."""
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if current_time - timestamp > self._cache_duration
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-            
     def get_volume_weighted_adjustments(self, base_levels: List[float], current_price: float, 
                                       side: str, analysis: MarketDepthAnalysis) -> List[float]:
         """
@@ -285,6 +313,19 @@ class MarketAnalyzer:
         if not volume_levels:
             return base_levels
             
+        min_strength = self._min_volume_strength
+        tolerance = self._volume_adjustment_tolerance
+        
+        # Strength and direction don't depend on the base level, so filter once
+        # (buy orders should be below current price, sell orders above) and sort
+        # by price; each base level then only looks at levels inside its window.
+        candidates = sorted(
+            (vol_level.price, vol_level.strength) for vol_level in volume_levels
+            if vol_level.strength >= min_strength
+            and (vol_level.price < current_price if side == 'buy' else vol_level.price > current_price)
+        )
+        candidate_prices = [price for price, _ in candidates]
+        
         adjusted_levels = []
         
         for base_price in base_levels:
@@ -292,27 +333,21 @@ class MarketAnalyzer:
             best_benefit = 0
             
             # Find nearby volume levels within tolerance
-            for vol_level in volume_levels:
-                if vol_level.strength < self._min_volume_strength:
+            window = base_price * tolerance
+            start = bisect_left(candidate_prices, base_price - window)
+            end = bisect_right(candidate_prices, base_price + window)
+            
+            for price, strength in candidates[start:end]:
+                adjustment_distance = abs(price - base_price) / base_price
+                if adjustment_distance > tolerance:
                     continue
                     
-                # Calculate adjustment distance
-                adjustment_distance = abs(vol_level.price - base_price) / base_price
+                # Calculate benefit score
+                benefit = strength * (1.0 - adjustment_distance)
                 
-                # Check if adjustment is within tolerance
-                if adjustment_distance <= self._volume_adjustment_tolerance:
-                    # Validate direction (buy orders should be below current price)
-                    if side == 'buy' and vol_level.price >= current_price:
-                        continue
-                    if side == 'sell' and vol_level.price <= current_price:
-                        continue
-                        
-                    # Calculate benefit score
-                    benefit = vol_level.strength * (1.0 - adjustment_distance)
-                    
-                    if benefit > best_benefit:
-                        best_adjustment = vol_level.price
-                        best_benefit = benefit
+                if benefit > best_benefit:
+                    best_adjustment = price
+                    best_benefit = benefit
                         
             adjusted_levels.append(best_adjustment)
             
@@ -338,22 +373,18 @@ class MarketAnalyzer:
             Bias-adjusted price levels
         """
         # Conservative bias application (max 1% adjustment)
-        bias_factor = imbalance * 0.01
+        bias = abs(imbalance * 0.01)
         
-        adjusted_levels = []
-        for price in levels:
-            if side == 'buy' and imbalance > 0:
-                # More buy pressure - slightly lower buy orders
-                adjusted_price = price * (1 - abs(bias_factor))
-            elif side == 'sell' and imbalance < 0:
-                # More sell pressure - slightly higher sell orders
-                adjusted_price = price * (1 + abs(bias_factor))
-            else:
-                adjusted_price = price
-                
-            adjusted_levels.append(adjusted_price)
-            
-        return adjusted_levels
+        if side == 'buy' and imbalance > 0:
+            # More buy pressure - slightly lower buy orders
+            factor = 1 - bias
+        elif side == 'sell' and imbalance < 0:
+            # More sell pressure - slightly higher sell orders
+            factor = 1 + bias
+        else:
+            return list(levels)
+            
+        return [price * factor for price in levels]
         
     def is_market_suitable_for_volume_weighting(self, analysis: MarketDepthAnalysis) -> bool:
         """
@@ -372,15 +403,21 @@ class MarketAnalyzer:
         if analysis.depth_quality < self._min_depth_quality:
             return False
             
-        # Check for sufficient volume levels
-        total_strong_levels = len([l for l in analysis.bid_levels + analysis.ask_levels 
-                                 if l.strength >= self._min_volume_strength])
-        
-        if total_strong_levels < 3:
-            return False
-            
         # Check spread reasonableness (not too wide)
         if analysis.spread_percent > 2.0:  # 2% spread threshold
             return False
             
+        # Check for sufficient volume levels last, as it is the only check that walks
+        # the level lists (three are enough, stop counting there)
+        min_strength = self._min_volume_strength
+        strong_levels = 0
+        for level in chain(analysis.bid_levels, analysis.ask_levels):
+            if level.strength >= min_strength:
+                strong_levels += 1
+                if strong_levels >= 3:
+                    break
+        
+        if strong_levels < 3:
+            return False
+            
         return True
\ No newline at end of file
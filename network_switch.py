@@ -8,42 +8,126 @@ Updates the .env file with appropriate network settings.
 """
 
 import os
+import re
 import sys
-from dotenv import load_dotenv, set_key, find_dotenv
+import argparse
+import shutil
+import tempfile
+from dotenv import dotenv_values, find_dotenv
+
+# Main menu choices
+_MENU_OPTIONS = ('1', '2', '3', '4')
+
+try:
+    import readline
+except ImportError:  # Not available on Windows; input() still works without history
+    readline = None
+
+if readline is not None:
+    def _complete_option(text, state):
+        matches = [option for option in _MENU_OPTIONS if option.startswith(text)]
+        return matches[state] if state < len(matches) else None
+    
+    readline.set_completer(_complete_option)
+    readline.parse_and_bind('tab: complete')
+
+# .env file this utility reads and updates, resolved once (--env-file overrides it)
+_ENV_FILE = find_dotenv()
+
+# Last result of load_current_config, keyed on the .env path and modification time
+_CONFIG_CACHE = {'key': None, 'data': None}
 
 def load_current_config():
-    """Load current configuration from .env file."""
-    load_dotenv()
+    """Load current configuration from .env file.
+    
+    The menu redraws this on every iteration, so the file is only re-read when
+    its modification time changes.
+    """
+    env_file = _ENV_FILE if os.path.isfile(_ENV_FILE) else ''
+    cache_key = (env_file, os.stat(env_file).st_mtime_ns if env_file else None)
+    if cache_key == _CONFIG_CACHE['key']:
+        return _CONFIG_CACHE['data']
     
-    current_network = os.getenv('NETWORK', 'devnet')
-    current_capital = os.getenv('CAPITAL')
-    current_rpc = os.getenv('RPC_URL')
+    # Parse without touching os.environ; the file wins so values written by a
+    # switch earlier in this session show up, the process environment fills gaps
+    values = dotenv_values(env_file) if env_file else {}
     
-    return {
+    def setting(key, default=None):
+        return values[key] if key in values else os.getenv(key, default)
+    
+    current_network = setting('NETWORK', 'devnet')
+    current_capital = setting('CAPITAL')
+    current_rpc = setting('RPC_URL')
+    
+    data = {
         'network': current_network,
         'capital': current_capital,
         'rpc_url': current_rpc
     }
+    _CONFIG_CACHE.update(key=cache_key, data=data)
+    return data
+
+def _env_line(key: str, value: str, prefix: str = '') -> str:
+    """Format a .env assignment the way dotenv's set_key does (single-quoted)."""
+    escaped = value.replace("'", "\\'")
+    return f"{prefix}{key}='{escaped}'\n"
 
-def switch_to_devnet():
-    """Switch configuration to devnet."""
+def _batch_set_env(env_file: str, updates: dict):
+    """Set several keys in a .env file with one read and one atomic write.
+    
+    Existing assignments (including indented and ``export`` ones, as dotenv
+    parses them) are rewritten in place and missing keys are appended.
+    """
+    with open(env_file) as f:
+        lines = f.readlines()
+    
+    pattern = re.compile(r'^(\s*(?:export\s+)?)(%s)\s*=' % '|'.join(map(re.escape, updates)))
+    missing = dict(updates)
+    for i, line in enumerate(lines):
+        match = pattern.match(line)
+        if match:
+            key = match.group(2)
+            lines[i] = _env_line(key, updates[key], match.group(1))
+            missing.pop(key, None)
+    
+    if missing and lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.extend(_env_line(key, value) for key, value in missing.items())
+    
+    # Write beside the original and swap it in, so a failed write never leaves a truncated .env
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(env_file)), prefix='.env.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.writelines(lines)
+        shutil.copymode(env_file, tmp_path)
+        os.replace(tmp_path, env_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    
+    # The mtime may not tick on coarse-grained filesystems; drop the cached config explicitly
+    _CONFIG_CACHE['key'] = None
+
+def switch_to_devnet(state: dict = None):
+    """Switch configuration to devnet, updating state (as from load_current_config) if given."""
     print("🔄 SWITCHING TO DEVNET")
     print("="*40)
     
-    env_file = find_dotenv()
-    if not env_file:
+    env_file = _ENV_FILE
+    if not os.path.isfile(env_file):
         print("❌ No .env file found. Create one from env.example first.")
         return False
     
     try:
-        # Update network setting
-        set_key(env_file, 'NETWORK', 'devnet')
-        
-        # Remove any custom RPC override to use network-based selection
-        set_key(env_file, 'RPC_URL', '')
-        
-        # Remove custom capital override to use network-based selection
-        set_key(env_file, 'CAPITAL', '')
+        _batch_set_env(env_file, {
+            'NETWORK': 'devnet',
+            # Remove any custom RPC override to use network-based selection
+            'RPC_URL': '',
+            # Remove custom capital override to use network-based selection
+            'CAPITAL': '',
+        })
+        if state is not None:
+            state.update(network='devnet', rpc_url='', capital='')
         
         print("✅ Network set to: devnet")
         print("✅ RPC URL: Auto-selected (https://api.devnet.solana.com)")
@@ -58,8 +142,8 @@ def switch_to_devnet():
         print(f"❌ Failed to update .env file: {e}")
         return False
 
-def switch_to_mainnet():
-    """Switch configuration to mainnet with safety prompts."""
+def switch_to_mainnet(state: dict = None):
+    """Switch configuration to mainnet with safety prompts, updating state if given."""
     print("🚨 SWITCHING TO MAINNET")
     print("="*40)
     print("⚠️  WARNING: Mainnet uses real money!")
@@ -97,23 +181,21 @@ def switch_to_mainnet():
     else:
         capital = None  # Use default
     
-    env_file = find_dotenv()
-    if not env_file:
+    env_file = _ENV_FILE
+    if not os.path.isfile(env_file):
         print("❌ No .env file found. Create one from env.example first.")
         return False
     
     try:
-        # Update network setting
-        set_key(env_file, 'NETWORK', 'mainnet')
-        
-        # Remove any custom RPC override to use network-based selection
-        set_key(env_file, 'RPC_URL', '')
-        
-        # Set capital if specified
-        if capital:
-            set_key(env_file, 'CAPITAL', str(capital))
-        else:
-            set_key(env_file, 'CAPITAL', '')  # Use default
+        _batch_set_env(env_file, {
+            'NETWORK': 'mainnet',
+            # Remove any custom RPC override to use network-based selection
+            'RPC_URL': '',
+            # Set capital if specified, otherwise use the default
+            'CAPITAL': str(capital) if capital else '',
+        })
+        if state is not None:
+            state.update(network='mainnet', rpc_url='', capital=str(capital) if capital else '')
         
         print("✅ Network set to: mainnet")
         print("✅ RPC URL: Auto-selected (https://api.mainnet-beta.solana.com)")
@@ -128,9 +210,10 @@ def switch_to_mainnet():
         print(f"❌ Failed to update .env file: {e}")
         return False
 
-def show_current_config():
-    """Display current network configuration."""
-    config = load_current_config()
+def show_current_config(config: dict = None):
+    """Display current network configuration (read from .env unless given)."""
+    if config is None:
+        config = load_current_config()
     
     print("📋 CURRENT CONFIGURATION")
     print("="*40)
@@ -183,8 +266,11 @@ def main():
     print("="*60)
     print()
     
+    # Read .env once; successful switches keep this in step with what they write
+    state = load_current_config()
+    
     while True:
-        show_current_config()
+        show_current_config(state)
         
         print("OPTIONS:")
         print("1. Switch to devnet (safe testing)")
@@ -193,11 +279,15 @@ def main():
         print("4. Exit")
         print()
         
-        choice = input("Select option (1-4): ").strip()
+        try:
+            choice = input("Select option (1-4): ").strip()
+        except EOFError:
+            # Input closed (e.g. piped script ran out); same as choosing Exit
+            choice = '4'
         
         if choice == '1':
             print()
-            if switch_to_devnet():
+            if switch_to_devnet(state):
                 print("🎉 Successfully switched to devnet!")
                 print("💡 Run: python3 test_devnet.py")
             else:
@@ -206,7 +296,7 @@ def main():
             
         elif choice == '2':
             print()
-            if switch_to_mainnet():
+            if switch_to_mainnet(state):
                 print("🎉 Successfully switched to mainnet!")
                 print("⚠️  Run: python3 test_mainnet.py")
             else:
@@ -230,6 +320,12 @@ def main():
             print()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Switch the grid bot between devnet and mainnet")
+    parser.add_argument('--env-file', help='Path to the .env file to use (default: nearest .env)')
+    args = parser.parse_args()
+    if args.env_file:
+        _ENV_FILE = os.path.abspath(args.env_file)
+    
     try:
         main()
     except KeyboardInterrupt:
@@ -7,56 +7,140 @@ This script shows how to integrate with Jupiter for real DEX trading.
 It demonstrates the actual API calls needed for live trading.
 """
 
-import requests
-import json
 import time
-import base64
+import requests
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
-from config import Config
-from solana_wallet import SolanaWallet
-from solana.rpc.api import Client
-from solders.transaction import Transaction
-from solders.pubkey import Pubkey
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from urllib.parse import urlencode
+from utils import json_dumps, json_loads
 import logging
 
+# The Solana stack (wallet, DEX client, solders) is imported where it is first
+# used, so the demo's confirmation prompt comes up without loading it
+if TYPE_CHECKING:
+    from solana_wallet import SolanaWallet
+    from solders.pubkey import Pubkey
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Smallest-unit factors for the demo's token amounts (SOL has 9 decimals, USDC 6)
+LAMPORTS_PER_SOL = 1_000_000_000
+USDC_DECIMALS_FACTOR = 1_000_000
+
+# Seconds a quote is reused for identical requests (price, risk and execute checks in one tick)
+QUOTE_CACHE_TTL = 0.5
+
+# Cached quotes (and encoded quote URLs) kept before the cache is cleared
+QUOTE_CACHE_SIZE = 256
+
+# Runs independent quote requests side by side on the shared session's pool
+_QUOTE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="jupiter-quote")
+
+@lru_cache(maxsize=64)
+def mint_pubkey(mint: str) -> 'Pubkey':
+    """Parse a mint address once; Pubkey is immutable, so callers share the result."""
+    from solders.pubkey import Pubkey
+    return Pubkey.from_string(mint)
+
 class JupiterTrader:
     """Real Jupiter API integration for DEX trading."""
     
-    def __init__(self, wallet: SolanaWallet):
+    __slots__ = (
+        'wallet', 'jupiter_api_url', 'quote_url', 'swap_url', 'rpc_client', 'session',
+        '_quote_cache', '_quote_urls', '_mock_counter',
+        'SOL_MINT', 'USDC_MINT', 'SOL_MINT_PK', 'USDC_MINT_PK',
+    )
+    
+    def __init__(self, wallet: 'SolanaWallet'):
+        from dex_client import JUPITER_SESSION
+        
         self.wallet = wallet
         self.jupiter_api_url = "https://quote-api.jup.ag/v6"
+        self.quote_url = f"{self.jupiter_api_url}/quote"
+        self.swap_url = f"{self.jupiter_api_url}/swap"
         self.rpc_client = wallet.rpc_client
+        # Keep-alive pool shared with the DEX client, so quote -> swap -> next quote
+        # reuses one TLS connection instead of handshaking per request
+        self.session = JUPITER_SESSION
+        self._quote_cache = {}
+        self._quote_urls = {}
+        self._mock_counter = itertools.count()
         
         # Token addresses
         self.SOL_MINT = "So11111111111111111111111111111111111111112"
         self.USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+        self.SOL_MINT_PK = mint_pubkey(self.SOL_MINT)
+        self.USDC_MINT_PK = mint_pubkey(self.USDC_MINT)
     
     def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50):
-        """Get quote from Jupiter API."""
+        """Get quote from Jupiter API, reusing an identical request's quote for QUOTE_CACHE_TTL."""
+        key = (input_mint, output_mint, amount, slippage_bps)
+        now = time.monotonic()
+        
+        cached = self._quote_cache.get(key)
+        if cached is not None and now - cached[0] < QUOTE_CACHE_TTL:
+            return cached[1]
+        
+        quote = self._request_quote(input_mint, output_mint, amount, slippage_bps)
+        if quote is not None:
+            if len(self._quote_cache) >= QUOTE_CACHE_SIZE:
+                self._quote_cache.clear()
+            self._quote_cache[key] = (now, quote)
+        return quote
+    
+    def _request_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int):
+        """Request a fresh quote from Jupiter API."""
         try:
-            params = {
-                'inputMint': input_mint,
-                'outputMint': output_mint,
-                'amount': str(amount),
-                'slippageBps': str(slippage_bps)
-            }
+            # Grid bots quote a handful of fixed requests, so encode each URL only once
+            key = (input_mint, output_mint, amount, slippage_bps)
+            url = self._quote_urls.get(key)
+            if url is None:
+                params = {
+                    'inputMint': input_mint,
+                    'outputMint': output_mint,
+                    'amount': str(amount),
+                    'slippageBps': str(slippage_bps)
+                }
+                if len(self._quote_urls) >= QUOTE_CACHE_SIZE:
+                    self._quote_urls.clear()
+                url = self._quote_urls[key] = f"{self.quote_url}?{urlencode(params)}"
             
-            response = requests.get(f"{self.jupiter_api_url}/quote", params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Jupiter quote failed: {response.status_code}")
-                return None
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            return json_loads(response.content)
                 
+        except requests.HTTPError as e:
+            logger.error(f"Jupiter quote failed: {e.response.status_code}")
+            return None
         except Exception as e:
             logger.error(f"Jupiter quote error: {e}")
             return None
     
+    def quotes_for_levels(self, levels: List[Tuple[str, str, int]], slippage_bps: int = 50) -> List[Optional[dict]]:
+        """Get quotes for several (input_mint, output_mint, amount) requests at once.
+        
+        The requests are independent, so they run concurrently and a grid tick costs
+        about one round trip instead of one per level. Results are in input order,
+        with None for failed quotes as from get_quote.
+        """
+        return self.get_quotes_batch([
+            {'input_mint': input_mint, 'output_mint': output_mint, 'amount': amount, 'slippage_bps': slippage_bps}
+            for input_mint, output_mint, amount in levels
+        ])
+    
+    def get_quotes_batch(self, quote_requests: List[dict]) -> List[Optional[dict]]:
+        """Get quotes for several get_quote keyword-argument dicts in one concurrent burst.
+        
+        Jupiter has no batch quote endpoint, so this fans the requests out over the
+        shared pool. Results are in input order, with None for failed quotes.
+        """
+        return list(_QUOTE_EXECUTOR.map(lambda request: self.get_quote(**request), quote_requests))
+    
     def get_swap_transaction(self, quote_data: dict, user_pubkey: str):
         """Get swap transaction from Jupiter API."""
         try:
@@ -68,94 +152,92 @@ class JupiterTrader:
                 'prioritizationFeeLamports': 'auto'
             }
             
-            response = requests.post(
-                f"{self.jupiter_api_url}/swap", 
-                json=swap_data, 
+            response = self.session.post(
+                self.swap_url,
+                data=json_dumps(swap_data),  # session sends Content-Type: application/json
                 timeout=30
             )
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Jupiter swap transaction failed: {response.status_code}")
-                return None
+            response.raise_for_status()
+            return json_loads(response.content)
                 
+        except requests.HTTPError as e:
+            logger.error(f"Jupiter swap transaction failed: {e.response.status_code}")
+            return None
         except Exception as e:
             logger.error(f"Jupiter swap transaction error: {e}")
             return None
     
-    def execute_swap(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50):
-        """Execute a complete swap through Jupiter."""
-        print(f"🔄 Executing swap: {amount/1e9:.4f} SOL → USDC")
+    def execute_swap(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                     simulate: bool = True):
+        """Execute a complete swap through Jupiter.
+        
+        With simulate (the default) nothing is signed or sent: the quote and swap
+        transaction are fetched and a mock signature is returned. Pass
+        simulate=False to sign, submit and wait for confirmation through the
+        wallet's DEXManager.
+        
+        Progress goes to the module logger rather than stdout, so loops of simulated
+        swaps can silence or buffer it (e.g. with a MemoryHandler); callers print
+        their own summary from the returned result.
+        """
+        logger.info("Executing swap: %.4f SOL -> USDC", amount / LAMPORTS_PER_SOL)
         
         # Step 1: Get quote
-        print("   📊 Getting quote from Jupiter...")
         quote = self.get_quote(input_mint, output_mint, amount, slippage_bps)
         
         if not quote:
-            print("   ❌ Failed to get quote")
+            logger.error("Swap aborted: failed to get quote")
             return None
         
         output_amount = int(quote['outAmount'])
         price_impact = float(quote.get('priceImpactPct', 0))
         
-        print(f"   ✅ Quote received:")
-        print(f"      Input: {amount/1e9:.4f} SOL")
-        print(f"      Output: {output_amount/1e6:.2f} USDC")
-        print(f"      Price Impact: {price_impact:.3f}%")
+        logger.info("Quote received: %.4f SOL -> %.2f USDC (price impact %.3f%%)",
+                    amount / LAMPORTS_PER_SOL, output_amount / USDC_DECIMALS_FACTOR, price_impact)
         
         # Step 2: Get swap transaction
-        print("   📝 Preparing swap transaction...")
         swap_tx = self.get_swap_transaction(quote, self.wallet.get_public_key())
         
         if not swap_tx:
-            print("   ❌ Failed to get swap transaction")
+            logger.error("Swap aborted: failed to get swap transaction")
             return None
         
-        # Step 3: Deserialize and sign transaction
-        print("   🔐 Signing transaction...")
-        try:
-            swap_transaction_bytes = base64.b64decode(swap_tx['swapTransaction'])
-            transaction = Transaction.from_bytes(swap_transaction_bytes)
-            
-            # Sign transaction with wallet
-            signed_tx = self.wallet.sign_transaction(transaction)
+        if simulate:
+            # Nothing is sent, so skip decoding and signing entirely
+            mock_signature = f"jupiter_{int(time.time())}_{next(self._mock_counter):04x}"
+            logger.info("Transaction submitted and confirmed (simulated): %s", mock_signature)
             
-            print("   ✅ Transaction signed")
-            
-        except Exception as e:
-            print(f"   ❌ Transaction signing failed: {e}")
-            return None
+            return {
+                'signature': mock_signature,
+                'input_amount': amount,
+                'output_amount': output_amount,
+                'price_impact': price_impact
+            }
         
-        # Step 4: Submit transaction (in real mode)
-        print("   🌐 Submitting transaction to Solana...")
+        # Step 3: Sign, submit and confirm through the DEX manager, so live swaps
+        # share its versioned-transaction handling and the wallet's send options
         try:
-            # In real implementation, this would submit to network
-            # For demo, we simulate the submission
-            
-            # signature = self.rpc_client.send_transaction(signed_tx)
-            # print(f"   ✅ Transaction submitted: {signature}")
+            from dex_client import get_dex_manager
             
-            # For simulation:
-            mock_signature = f"jupiter_{int(time.time())}_{hash(str(transaction)) % 10000}"
-            print(f"   ✅ Transaction submitted (simulated)")
-            print(f"      Signature: {mock_signature}")
-            
-            # Wait for confirmation
-            print("   ⏳ Waiting for confirmation...")
-            time.sleep(3)  # Simulate network delay
+            dex_manager = get_dex_manager(self.wallet)
+            signature = dex_manager.sign_and_send_transaction(swap_tx['swapTransaction'])
+            if not signature:
+                return None
+            logger.info("Transaction submitted: %s", signature)
             
-            print("   ✅ Transaction confirmed!")
+            if not dex_manager.wait_for_confirmation(signature):
+                return None
             
             return {
-                'signature': mock_signature,
+                'signature': str(signature),
                 'input_amount': amount,
                 'output_amount': output_amount,
                 'price_impact': price_impact
             }
             
         except Exception as e:
-            print(f"   ❌ Transaction submission failed: {e}")
+            logger.error(f"Transaction submission failed: {e}")
             return None
 
 def demonstrate_real_trading():
@@ -168,6 +250,9 @@ def demonstrate_real_trading():
     print("📊 Uses live market data and pricing")
     print("=" * 60)
     
+    from config import Config
+    from solana_wallet import SolanaWallet
+    
     # Initialize wallet
     config = Config()
     
@@ -204,14 +289,14 @@ def demonstrate_real_trading():
         quote = trader.get_quote(
             trader.SOL_MINT,
             trader.USDC_MINT,
-            int(0.1 * 1e9),  # 0.1 SOL in lamports
+            LAMPORTS_PER_SOL // 10,  # 0.1 SOL in lamports
             50  # 0.5% slippage
         )
         
         if quote:
             print("✅ Live quote received from Jupiter:")
             print(f"   Input: 0.1 SOL")
-            print(f"   Output: {int(quote['outAmount'])/1e6:.2f} USDC")
+            print(f"   Output: {int(quote['outAmount']) / USDC_DECIMALS_FACTOR:.2f} USDC")
             print(f"   Price Impact: {quote.get('priceImpactPct', 0):.3f}%")
             
             # Show route information
@@ -236,15 +321,15 @@ def demonstrate_real_trading():
         result = trader.execute_swap(
             trader.SOL_MINT,
             trader.USDC_MINT,
-            int(0.05 * 1e9),  # 0.05 SOL
+            LAMPORTS_PER_SOL // 20,  # 0.05 SOL
             50  # 0.5% slippage
         )
         
         if result:
             print("✅ Trade execution completed!")
             print(f"   Signature: {result['signature']}")
-            print(f"   Traded: {result['input_amount']/1e9:.4f} SOL")
-            print(f"   Received: {result['output_amount']/1e6:.2f} USDC")
+            print(f"   Traded: {result['input_amount'] / LAMPORTS_PER_SOL:.4f} SOL")
+            print(f"   Received: {result['output_amount'] / USDC_DECIMALS_FACTOR:.2f} USDC")
             print(f"   Price Impact: {result['price_impact']:.3f}%")
         else:
             print("❌ Trade execution failed")
@@ -1,13 +1,42 @@
+import math
+import struct
 import time
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import logging
 from market_analysis import MarketAnalyzer
 
 logger = logging.getLogger(__name__)
 
+HISTORY_FILE = 'trading_history.bin'
+LEGACY_HISTORY_FILE = 'trading_history.json'
+
+# total_trades, winning_trades, losing_trades, total_pnl, daily_pnl,
+# max_drawdown, win_rate, last_updated (ISO timestamp)
+_METRIC_FMT = '<qqqdddd26s'
+_METRIC_RECORD = struct.Struct(_METRIC_FMT)
+
+def _volatility_kernel(positions: List['Position']) -> Optional[float]:
+    """Sample stdev of |P&L| / notional over filled positions, or None below 5 samples."""
+    # Single pass (Welford) fusing the filter, ratio and variance accumulation
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for pos in positions:
+        if pos.status != 'filled' or pos.profit_loss == 0:
+            continue
+        ratio = abs(pos.profit_loss) / (pos.quantity * pos.price)
+        count += 1
+        delta = ratio - mean
+        mean += delta / count
+        m2 += delta * (ratio - mean)
+    
+    if count < 5:
+        return None
+    return math.sqrt(m2 / (count - 1))
+
 @dataclass
 class Position:
     """Represents a trading position."""
@@ -15,7 +44,7 @@ class Position:
     side: str  # 'buy' or 'sell'
     quantity: float
     price: float
-    timestamp: float
+    timestamp: int  # time.monotonic_ns() when the order was placed
     status: str  # 'open', 'filled', 'cancelled'
     profit_loss: float = 0.0
 
@@ -37,11 +66,24 @@ class RiskManager:
         self.config = config
         self.positions: List[Position] = []
         self.risk_metrics = RiskMetrics()
-        self.session_start = time.time()
+        self.session_start = time.monotonic_ns()
         self.daily_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         self.max_capital_used = 0.0
         self.peak_capital = 0.0
         
+        # Running totals over self.positions, folded in by _track_new_positions
+        self._positions_by_id: Dict[str, Position] = {}
+        self._tracked_count = 0
+        self._open_positions: Dict[str, Position] = {}
+        self._open_exposure = 0.0
+        self._positive_filled_pnl = 0.0
+        
+        # Base grid levels keyed by (rounded price, total trades); cleared by refresh_config
+        self._grid_cache: Dict[Tuple[float, int], Tuple[Tuple[float, ...], Tuple[float, ...]]] = {}
+        
+        # Snapshot of the config values read on every sizing and risk check
+        self.refresh_config()
+        
         # Initialize market analyzer for volume-weighted grids (P3)
         # Handle both dict and Config object
         if isinstance(config, dict):
@@ -52,6 +94,26 @@ class RiskManager:
         # Load historical data if exists
         self._load_historical_data()
     
+    def _track_new_positions(self):
+        """Fold positions appended since the last call into the running totals."""
+        positions = self.positions
+        if len(positions) < self._tracked_count:
+            # The list was replaced or trimmed; start over
+            self._positions_by_id.clear()
+            self._tracked_count = 0
+            self._open_positions.clear()
+            self._open_exposure = 0.0
+            self._positive_filled_pnl = 0.0
+        
+        for position in positions[self._tracked_count:]:
+            self._positions_by_id.setdefault(position.id, position)
+            if position.status == 'open':
+                self._open_positions[position.id] = position
+                self._open_exposure += position.quantity * position.price
+            elif position.status == 'filled' and position.profit_loss > 0:
+                self._positive_filled_pnl += position.profit_loss
+        self._tracked_count = len(positions)
+    
     def _get_config_value(self, key: str, default=None):
         """Safely get config value from either dict or Config object."""
         if isinstance(self.config, dict):
@@ -59,13 +121,43 @@ class RiskManager:
         else:
             return getattr(self.config, key.upper(), default)
     
+    def refresh_config(self):
+        """Re-read cached config values; call after mutating the config."""
+        self._capital = self._get_config_value('capital', 250.0)
+        self._compound_profits = self._get_config_value('compound_profits', True)
+        self._stop_loss_pct = self._get_config_value('stop_loss_percent', 0.05)
+        self._max_daily_loss = self._get_config_value('max_daily_loss', 0.05)
+        self._grid_cache.clear()
+    
     def _load_historical_data(self):
         """Load historical trading data from file."""
         try:
-            with open('trading_history.json', 'r') as f:
+            with open(HISTORY_FILE, 'rb') as f:
+                (total_trades, winning_trades, losing_trades, total_pnl, daily_pnl,
+                 max_drawdown, win_rate, _) = _METRIC_RECORD.unpack(f.read(_METRIC_RECORD.size))
+            self.risk_metrics = RiskMetrics(
+                total_pnl=total_pnl,
+                daily_pnl=daily_pnl,
+                max_drawdown=max_drawdown,
+                win_rate=win_rate,
+                total_trades=total_trades,
+                winning_trades=winning_trades,
+                losing_trades=losing_trades
+            )
+            logger.info("Loaded historical trading data")
+        except FileNotFoundError:
+            self._migrate_legacy_historical_data()
+        except Exception as e:
+            logger.error(f"Failed to load historical data: {e}")
+    
+    def _migrate_legacy_historical_data(self):
+        """Load trading data from the old JSON file and rewrite it as binary."""
+        try:
+            with open(LEGACY_HISTORY_FILE, 'r') as f:
                 data = json.load(f)
-                self.risk_metrics = RiskMetrics(**data.get('metrics', {}))
-                logger.info("Loaded historical trading data")
+            self.risk_metrics = RiskMetrics(**data.get('metrics', {}))
+            self._save_historical_data()
+            logger.info(f"Migrated historical trading data from {LEGACY_HISTORY_FILE}")
         except FileNotFoundError:
             logger.info("No historical data found, starting fresh")
         except Exception as e:
@@ -74,12 +166,19 @@ class RiskManager:
     def _save_historical_data(self):
         """Save trading data to file."""
         try:
-            data = {
-                'metrics': asdict(self.risk_metrics),
-                'last_updated': datetime.now().isoformat()
-            }
-            with open('trading_history.json', 'w') as f:
-                json.dump(data, f, indent=2)
+            metrics = self.risk_metrics
+            record = _METRIC_RECORD.pack(
+                metrics.total_trades,
+                metrics.winning_trades,
+                metrics.losing_trades,
+                metrics.total_pnl,
+                metrics.daily_pnl,
+                metrics.max_drawdown,
+                metrics.win_rate,
+                datetime.now().isoformat(timespec='microseconds').encode('ascii')
+            )
+            with open(HISTORY_FILE, 'wb') as f:
+                f.write(record)
         except Exception as e:
             logger.error(f"Failed to save historical data: {e}")
     
@@ -128,14 +227,12 @@ class RiskManager:
 
     def _get_effective_capital(self) -> float:
         """Calculate effective capital including compounded profits."""
-        base_capital = self._get_config_value('capital', 250.0)
+        base_capital = self._capital
         
-        if self._get_config_value('compound_profits', True):
+        if self._compound_profits:
             # Add realized profits to capital base
-            total_realized_pnl = sum(
-                pos.profit_loss for pos in self.positions 
-                if pos.status == 'filled' and pos.profit_loss > 0
-            )
+            self._track_new_positions()
+            total_realized_pnl = self._positive_filled_pnl
             # Only compound positive P&L, up to 2x original capital
             compounded_profits = min(total_realized_pnl, base_capital)
             effective_capital = base_capital + max(0, compounded_profits)
@@ -276,22 +373,19 @@ class RiskManager:
 
     def _get_fallback_position_size(self, price: float, base_risk: float) -> float:
         """Get safe fallback position size on calculation errors."""
-        safe_capital = self._get_config_value('capital', 250.0)
+        safe_capital = self._capital
         safe_risk = min(base_risk, 0.02)  # Cap at 2% for safety
         return (safe_capital * safe_risk) / price
     
     def get_current_exposure(self) -> float:
         """Calculate current market exposure."""
-        exposure = 0.0
-        for position in self.positions:
-            if position.status == 'open':
-                exposure += position.quantity * position.price
-        return exposure
+        self._track_new_positions()
+        return self._open_exposure
     
     def check_daily_loss_limit(self) -> bool:
         """Check if daily loss limit has been reached."""
         daily_loss = abs(min(0, self.risk_metrics.daily_pnl))
-        max_daily_loss = self._get_config_value('capital', 250.0) * self._get_config_value('max_daily_loss', 0.05)
+        max_daily_loss = self._capital * self._max_daily_loss
         
         if daily_loss >= max_daily_loss:
             logger.warning(f"Daily loss limit reached: {daily_loss:.2f} >= {max_daily_loss:.2f}")
@@ -301,47 +395,63 @@ class RiskManager:
     def check_stop_loss(self, current_price: float) -> List[str]:
         """Check stop loss conditions and return positions to close."""
         positions_to_close = []
+        buy_factor = 1 - self._stop_loss_pct
+        sell_factor = 1 + self._stop_loss_pct
         
-        for position in self.positions:
-            if position.status != 'open':
-                continue
-                
+        self._track_new_positions()
+        for position in self._open_positions.values():
             if position.side == 'buy':
                 # Check if price dropped below stop loss
-                stop_loss_price = position.price * (1 - self._get_config_value('stop_loss_percent', 0.05))
-                if current_price <= stop_loss_price:
+                if current_price <= position.price * buy_factor:
                     positions_to_close.append(position.id)
-                    logger.warning(f"Stop loss triggered for buy position {position.id} at {current_price:.2f}")
             
             elif position.side == 'sell':
                 # Check if price rose above stop loss
-                stop_loss_price = position.price * (1 + self._get_config_value('stop_loss_percent', 0.05))
-                if current_price >= stop_loss_price:
+                if current_price >= position.price * sell_factor:
                     positions_to_close.append(position.id)
-                    logger.warning(f"Stop loss triggered for sell position {position.id} at {current_price:.2f}")
+        
+        if positions_to_close:
+            logger.warning(f"Stop loss triggered for {len(positions_to_close)} positions at {current_price:.2f}: "
+                           f"{', '.join(positions_to_close)}")
         
         return positions_to_close
     
     def update_position(self, position_id: str, status: str, fill_price: float = None):
         """Update position status and calculate P&L."""
-        for position in self.positions:
-            if position.id == position_id:
-                old_status = position.status
-                position.status = status
-                
-                if status == 'filled' and fill_price:
-                    # Calculate P&L
-                    if position.side == 'buy':
-                        position.profit_loss = (fill_price - position.price) * position.quantity
-                    else:  # sell
-                        position.profit_loss = (position.price - fill_price) * position.quantity
-                    
-                    # Update metrics
-                    self._update_metrics(position.profit_loss)
-                    
-                    logger.info(f"Position {position_id} filled at {fill_price:.2f}, P&L: {position.profit_loss:.2f}")
-                
-                break
+        self._track_new_positions()
+        position = self._positions_by_id.get(position_id)
+        if position is None:
+            return
+        
+        old_status = position.status
+        if old_status == 'filled' and position.profit_loss > 0:
+            self._positive_filled_pnl -= position.profit_loss
+        position.status = status
+        
+        # Keep the open exposure total in step with the status change
+        if old_status == 'open' and status != 'open':
+            self._open_positions.pop(position_id, None)
+            self._open_exposure -= position.quantity * position.price
+            if not self._open_positions:
+                self._open_exposure = 0.0  # Drop accumulated rounding error
+        elif old_status != 'open' and status == 'open':
+            self._open_positions[position_id] = position
+            self._open_exposure += position.quantity * position.price
+        
+        if status == 'filled' and fill_price:
+            # Calculate P&L
+            if position.side == 'buy':
+                position.profit_loss = (fill_price - position.price) * position.quantity
+            else:  # sell
+                position.profit_loss = (position.price - fill_price) * position.quantity
+            
+            # Update metrics
+            self._update_metrics(position.profit_loss)
+            
+            logger.info(f"Position {position_id} filled at {fill_price:.2f}, P&L: {position.profit_loss:.2f}")
+        
+        if status == 'filled' and position.profit_loss > 0:
+            self._positive_filled_pnl += position.profit_loss
     
     def _update_metrics(self, pnl: float):
         """Update risk metrics with new P&L."""
@@ -375,12 +485,21 @@ class RiskManager:
     def add_position(self, position: Position):
         """Add a new position to track."""
         self.positions.append(position)
+        self._track_new_positions()
         logger.info(f"Added position: {position.side} {position.quantity} at {position.price}")
     
+    def add_positions(self, positions: List[Position]):
+        """Add a batch of new positions to track in a single update."""
+        if not positions:
+            return
+        self.positions.extend(positions)
+        self._track_new_positions()
+        logger.info(f"Added {len(positions)} positions")
+    
     def get_performance_summary(self) -> Dict:
         """Get current performance summary."""
         current_exposure = self.get_current_exposure()
-        session_duration = time.time() - self.session_start
+        session_duration = (time.monotonic_ns() - self.session_start) / 1e9
         
         return {
             'total_pnl': self.risk_metrics.total_pnl,
@@ -390,7 +509,7 @@ class RiskManager:
             'current_exposure': current_exposure,
             'max_drawdown': self.risk_metrics.max_drawdown,
             'session_duration_hours': session_duration / 3600,
-            'roi_percent': (self.risk_metrics.total_pnl / self._get_config_value('capital', 250.0)) * 100 if self._get_config_value('capital', 250.0) > 0 else 0
+            'roi_percent': (self.risk_metrics.total_pnl / self._capital) * 100 if self._capital > 0 else 0
         }
     
     def should_continue_trading(self) -> bool:
@@ -400,7 +519,7 @@ class RiskManager:
             return False
         
         # Check if max drawdown exceeded
-        max_drawdown_limit = self._get_config_value('capital', 250.0) * 0.15  # 15% max drawdown
+        max_drawdown_limit = self._capital * 0.15  # 15% max drawdown
         if abs(self.risk_metrics.max_drawdown) > max_drawdown_limit:
             logger.warning(f"Maximum drawdown exceeded: {self.risk_metrics.max_drawdown:.2f}")
             return False
@@ -454,12 +573,28 @@ class RiskManager:
         spacing = abs(buy_prices[0] - current_price) / current_price if buy_prices else 0.01
         
         logger.info(f"Final grid: {base_grid_levels} levels, spacing: {spacing:.1%}, "
-                   f"volatility: {volatility:.1%}, capital: ${self._get_config_value('capital', 250.0)}")
+                   f"volatility: {volatility:.1%}, capital: ${self._capital}")
         
         return buy_prices, sell_prices
     
     def _calculate_base_grid_levels(self, current_price: float) -> Tuple[List[float], List[float]]:
         """Calculate base micro-grid levels (P1 implementation)."""
+        # Results only change with price and trade history (through volatility)
+        cache_key = (round(current_price, 4), self.risk_metrics.total_trades)
+        cached = self._grid_cache.get(cache_key)
+        if cached is not None:
+            return list(cached[0]), list(cached[1])
+        
+        buy_prices, sell_prices = self._compute_base_grid_levels(current_price)
+        
+        if len(self._grid_cache) >= 256:
+            self._grid_cache.clear()
+        self._grid_cache[cache_key] = (tuple(buy_prices), tuple(sell_prices))
+        
+        return buy_prices, sell_prices
+    
+    def _compute_base_grid_levels(self, current_price: float) -> Tuple[List[float], List[float]]:
+        """Compute base micro-grid levels without consulting the cache."""
         base_grid_levels = self._get_config_value('grid_levels', 5)
         
         if self._get_config_value('micro_grid_mode', True):
@@ -468,7 +603,7 @@ class RiskManager:
             base_spacing = self._get_config_value('price_range_percent', 0.10) / base_grid_levels
             
             # Small capital optimizations
-            capital = self._get_config_value('capital', 250.0)
+            capital = self._capital
             if capital < self._get_config_value('small_capital_threshold', 1000):
                 # Increase grid density for small capital
                 density_multiplier = self._get_config_value('grid_density_multiplier', 2.0)
@@ -506,8 +641,9 @@ class RiskManager:
         
         # Generate base grid levels
         price_step = current_price * spacing
-        buy_prices = [current_price - (i * price_step) for i in range(1, grid_levels + 1)]
-        sell_prices = [current_price + (i * price_step) for i in range(1, grid_levels + 1)]
+        offsets = [i * price_step for i in range(1, grid_levels + 1)]
+        buy_prices = [current_price - offset for offset in offsets]
+        sell_prices = [current_price + offset for offset in offsets]
         
         return buy_prices, sell_prices
 
@@ -530,33 +666,19 @@ class RiskManager:
             if self.risk_metrics.total_trades < 10:
                 return 0.02  # Default 2% volatility for new accounts
             
-            # Get recent position P&L data for volatility proxy
-            recent_positions = [pos for pos in self.positions[-50:] 
-                               if pos.status == 'filled' and pos.profit_loss != 0]
-            
-            if len(recent_positions) < 5:
+            # Price movement volatility from recent position P&L variance
+            volatility = _volatility_kernel(self.positions[-50:])
+            if volatility is None:
                 return 0.02  # Insufficient data
             
-            # Calculate price movement volatility from P&L variance
-            import statistics
-            pnl_percentages = [
-                abs(pos.profit_loss) / (pos.quantity * pos.price) 
-                for pos in recent_positions
-            ]
-            
-            if len(pnl_percentages) >= 5:
-                volatility = statistics.stdev(pnl_percentages)
-                
-                # Apply smoothing factor to prevent overreaction
-                smoothing_factor = 0.7
-                previous_volatility = getattr(self, '_last_volatility', 0.02)
-                self._last_volatility = (smoothing_factor * previous_volatility + 
-                                       (1 - smoothing_factor) * volatility)
-                
-                # Return clamped volatility
-                return max(0.005, min(0.15, self._last_volatility))
+            # Apply smoothing factor to prevent overreaction
+            smoothing_factor = 0.7
+            previous_volatility = getattr(self, '_last_volatility', 0.02)
+            self._last_volatility = (smoothing_factor * previous_volatility + 
+                                   (1 - smoothing_factor) * volatility)
             
-            return 0.02  # Safe default
+            # Return clamped volatility
+            return max(0.005, min(0.15, self._last_volatility))
             
         except Exception as e:
             logger.warning(f"Volatility calculation failed: {e}")
@@ -1,6 +1,8 @@
 import os
+import time
 import base58
 import json
+import threading
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from solana.rpc.api import Client
@@ -8,11 +10,38 @@ from solders.transaction import Transaction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey as PublicKey
 from solana.rpc.commitment import Commitment
+from solana.rpc.types import TxOpts
 import logging
 from hardware_wallet import HardwareWalletManager
 
 logger = logging.getLogger(__name__)
 
+# SPL Token program, parsed once instead of on every balance lookup
+TOKEN_PROGRAM_ID = PublicKey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+
+# Common Solana tokens
+TOKEN_SYMBOLS = {
+    "So11111111111111111111111111111111111111112": "SOL",
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": "USDC",
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": "USDT",
+    "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": "ETH",
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": "BONK",
+    "7dHbWXmci3dT8UFYWYZweBLXgycu7Y3iL6trKn1Y7ARj": "stSOL",
+}
+
+# RPC clients shared by every wallet, one per endpoint, so they reuse one connection pool
+_RPC_CLIENTS: Dict[str, Client] = {}
+_RPC_CLIENTS_LOCK = threading.Lock()
+
+def get_rpc_client(rpc_url: str) -> Client:
+    """Return the shared RPC client for an endpoint, creating it on first use."""
+    with _RPC_CLIENTS_LOCK:
+        client = _RPC_CLIENTS.get(rpc_url)
+        if client is None:
+            client = Client(rpc_url, commitment=Commitment("confirmed"))
+            _RPC_CLIENTS[rpc_url] = client
+        return client
+
 @dataclass
 class TokenBalance:
     """Represents a token balance."""
@@ -21,11 +50,40 @@ class TokenBalance:
     balance: float
     decimals: int
 
+class BlockhashCache:
+    """Caches the latest blockhash for a short TTL.
+    
+    Blockhashes stay valid for ~150 slots (60-90 seconds), so reusing one for up to
+    25 seconds saves an RPC round-trip per signature while leaving ample validity.
+    """
+    
+    def __init__(self, rpc_client: Client, ttl: float = 25.0):
+        self.rpc_client = rpc_client
+        self.ttl = ttl
+        self._blockhash = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Return a recent blockhash, fetching a new one once the cached value expires."""
+        with self._lock:
+            if self._blockhash is None or time.monotonic() - self._fetched_at >= self.ttl:
+                response = self.rpc_client.get_latest_blockhash()
+                self._blockhash = response.value.blockhash
+                self._fetched_at = time.monotonic()
+            return self._blockhash
+    
+    def invalidate(self):
+        """Drop the cached blockhash so the next get() fetches a new one."""
+        with self._lock:
+            self._blockhash = None
+
 class SolanaWallet:
     """Manages Solana wallet operations for DEX trading."""
     
     def __init__(self, private_key: str = None, rpc_url: str = "https://api.mainnet-beta.solana.com", 
-                 wallet_type: str = "software", derivation_path: str = "44'/501'/0'/0'"):
+                 wallet_type: str = "software", derivation_path: str = "44'/501'/0'/0'",
+                 send_rpc_url: str = None, skip_preflight: bool = False):
         """
         Initialize wallet with either private key (software) or hardware wallet.
         
@@ -34,8 +92,15 @@ class SolanaWallet:
             rpc_url: Solana RPC endpoint
             wallet_type: 'software', 'ledger', or 'trezor'
             derivation_path: BIP44 derivation path for hardware wallets
+            send_rpc_url: Optional separate RPC endpoint for broadcasting (e.g. Helius)
+            skip_preflight: Skip RPC preflight simulation when sending transactions
         """
-        self.rpc_client = Client(rpc_url, commitment=Commitment("confirmed"))
+        self.rpc_client = get_rpc_client(rpc_url)
+        self.send_client = get_rpc_client(send_rpc_url) if send_rpc_url else self.rpc_client
+        self.send_opts = TxOpts(skip_preflight=True, preflight_commitment=Commitment("confirmed")) if skip_preflight else None
+        self.blockhash_cache = BlockhashCache(self.rpc_client)
+        # DEXManager bound to this wallet, created by dex_client.get_dex_manager
+        self._dex_manager = None
         self.wallet_type = wallet_type.lower()
         self.hardware_wallet = None
         self.keypair = None
@@ -56,7 +121,11 @@ class SolanaWallet:
         else:
             raise ValueError("wallet_type must be 'software', 'ledger', or 'trezor'")
         
-        logger.info(f"{self.wallet_type.title()} wallet initialized: {self.public_key}")
+        # Base58-encode the public key once; it is logged and sent on every swap
+        self.public_key_str = str(self.public_key)
+        self.public_key_short = self.public_key_str[:8]
+        
+        logger.info("%s wallet initialized: %s", self.wallet_type.title(), self.public_key_str)
     
     def _load_keypair(self, private_key: str) -> Keypair:
         """Load keypair from private key string."""
@@ -89,18 +158,15 @@ class SolanaWallet:
     
     def get_public_key(self) -> str:
         """Get public key as string."""
-        return str(self.public_key)
+        return self.public_key_str
     
     
     def get_token_balances(self) -> List[TokenBalance]:
         """Get all token balances."""
         try:
-            from solders.pubkey import Pubkey
-            token_program_id = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-            
             response = self.rpc_client.get_token_accounts_by_owner(
                 self.public_key,
-                {"programId": token_program_id}
+                {"programId": TOKEN_PROGRAM_ID}
             )
             
             balances = []
@@ -130,16 +196,7 @@ class SolanaWallet:
     
     def _get_token_symbol(self, mint: str) -> str:
         """Get token symbol from mint address."""
-        # Common Solana tokens
-        token_symbols = {
-            "So11111111111111111111111111111111111111112": "SOL",
-            "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": "USDC",
-            "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": "USDT",
-            "7vfCXTUXx5WJV5JADk17DUJ4ksgau7utNKj4b963voxs": "ETH",
-            "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": "BONK",
-            "7dHbWXmci3dT8UFYWYZweBLXgycu7Y3iL6trKn1Y7ARj": "stSOL",
-        }
-        return token_symbols.get(mint, mint[:8])
+        return TOKEN_SYMBOLS.get(mint, mint[:8])
     
     def sign_transaction(self, transaction) -> any:
         """Sign a transaction with either software or hardware wallet.
@@ -194,9 +251,8 @@ class SolanaWallet:
                 from solders.instruction import Instruction
                 from solders.hash import Hash
                 
-                # Always get fresh blockhash
-                recent_blockhash_response = self.rpc_client.get_latest_blockhash()
-                fresh_blockhash = recent_blockhash_response.value.blockhash
+                # Get a recent blockhash (cached for a few seconds to save an RPC round-trip)
+                fresh_blockhash = self.blockhash_cache.get()
                 
                 logger.debug(f"🔄 Using fresh blockhash: {str(fresh_blockhash)[:8]}...")
                 
@@ -277,8 +333,8 @@ class SolanaWallet:
             Transaction signature
         """
         try:
-            # Send the transaction via RPC
-            response = self.rpc_client.send_transaction(signed_transaction)
+            # Send the transaction via the broadcast RPC (same as rpc_client unless overridden)
+            response = self.send_client.send_transaction(signed_transaction, opts=self.send_opts)
             
             if response.value:
                 logger.info(f"Transaction sent: {response.value}")
@@ -349,7 +405,7 @@ class SolanaWallet:
         """Get wallet information including type and connection status."""
         info = {
             'wallet_type': self.wallet_type,
-            'public_key': str(self.public_key),
+            'public_key': self.public_key_str,
             'connected': True
         }
         
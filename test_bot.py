@@ -9,6 +9,7 @@ Useful for validating configuration and logic before live trading.
 
 import sys
 import os
+import time
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 import tempfile
@@ -17,7 +18,7 @@ import json
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import Config
+from config import Config, get_config
 from security import SecurityManager
 from risk_manager import RiskManager, Position
 from api_client import APIClient
@@ -53,6 +54,10 @@ class TestConfig(unittest.TestCase):
         config = Config()
         with self.assertRaises(ValueError):
             config.validate()
+    
+    def test_get_config_cached(self):
+        """Test that get_config returns a shared instance."""
+        self.assertIs(get_config(), get_config())
 
 class TestSecurityManager(unittest.TestCase):
     """Test security manager functionality."""
@@ -129,7 +134,17 @@ class TestRiskManager(unittest.TestCase):
         self.risk_manager.risk_metrics.daily_pnl = -15.0  # -$15 loss
         # Should stop trading (loss > 5% of $250 = $12.5)
         self.assertFalse(self.risk_manager.check_daily_loss_limit())
-    
+
+    def test_refresh_config(self):
+        """Test config changes take effect after refresh_config."""
+        self.risk_manager.risk_metrics.daily_pnl = -15.0
+        self.config['max_daily_loss'] = 0.10
+
+        # Limits are snapshotted until the config is refreshed
+        self.assertFalse(self.risk_manager.check_daily_loss_limit())
+        self.risk_manager.refresh_config()
+        self.assertTrue(self.risk_manager.check_daily_loss_limit())
+
     def test_stop_loss_checking(self):
         """Test stop loss checking."""
         # Add a buy position
@@ -150,6 +165,116 @@ class TestRiskManager(unittest.TestCase):
         # Check stop loss at 96% of buy price (should not trigger)
         positions_to_close = self.risk_manager.check_stop_loss(96.0)
         self.assertNotIn("test_buy", positions_to_close)
+
+    def test_stop_loss_skips_closed_positions(self):
+        """Test stop loss only considers positions that are still open."""
+        for position_id, side in (("sl_buy", "buy"), ("sl_sell", "sell"), ("sl_done", "sell")):
+            self.risk_manager.add_position(Position(
+                id=position_id, side=side, quantity=1.0, price=100.0,
+                timestamp=1234567890, status="open"
+            ))
+        self.risk_manager.update_position("sl_done", "cancelled")
+
+        self.assertEqual(self.risk_manager.check_stop_loss(106.0), ["sl_sell"])
+        self.assertEqual(self.risk_manager.check_stop_loss(94.0), ["sl_buy"])
+        self.assertEqual(self.risk_manager.check_stop_loss(100.0), [])
+
+    def test_add_positions_batch(self):
+        """Test batched position registration."""
+        positions = [
+            Position(id=f"batch_{i}", side="buy", quantity=1.0, price=100.0,
+                     timestamp=1234567890, status="open")
+            for i in range(3)
+        ]
+        self.risk_manager.add_positions(positions)
+        self.risk_manager.add_positions([])
+        
+        self.assertEqual([p.id for p in self.risk_manager.positions], ["batch_0", "batch_1", "batch_2"])
+        self.assertAlmostEqual(self.risk_manager.get_current_exposure(), 300.0)
+
+    def test_exposure_tracks_status_updates(self):
+        """Test open exposure follows fills, cancels and direct appends."""
+        for i in range(2):
+            self.risk_manager.add_position(Position(
+                id=f"exp_{i}", side="buy", quantity=0.5, price=100.0,
+                timestamp=1234567890, status="open"
+            ))
+        self.risk_manager.positions.append(Position(
+            id="exp_direct", side="sell", quantity=1.0, price=110.0,
+            timestamp=1234567890, status="open"
+        ))
+        self.assertAlmostEqual(self.risk_manager.get_current_exposure(), 210.0)
+
+        self.risk_manager.update_position("exp_0", "filled", 101.0)
+        self.risk_manager.update_position("exp_direct", "cancelled")
+        self.assertAlmostEqual(self.risk_manager.get_current_exposure(), 50.0)
+
+        self.risk_manager.update_position("exp_1", "cancelled")
+        self.assertEqual(self.risk_manager.get_current_exposure(), 0.0)
+
+    def test_effective_capital_compounds_filled_profits(self):
+        """Test realized profits from fills are compounded into capital."""
+        for i, fill_price in enumerate((110.0, 90.0)):
+            self.risk_manager.add_position(Position(
+                id=f"pnl_{i}", side="buy", quantity=1.0, price=100.0,
+                timestamp=1234567890, status="open"
+            ))
+            self.risk_manager.update_position(f"pnl_{i}", "filled", fill_price)
+
+        # Only the winning fill counts towards compounding
+        self.assertAlmostEqual(self.risk_manager._get_effective_capital(), 260.0)
+
+        self.risk_manager.update_position("pnl_0", "cancelled")
+        self.assertAlmostEqual(self.risk_manager._get_effective_capital(), 250.0)
+
+    def test_recent_volatility(self):
+        """Test volatility is the smoothed stdev of recent fill P&L ratios."""
+        self.risk_manager.risk_metrics.total_trades = 10
+        pnls = [1.0, 2.0, 3.0, 4.0, 6.0]
+        for i, pnl in enumerate(pnls):
+            self.risk_manager.positions.append(Position(
+                id=f"vol_{i}", side="buy", quantity=1.0, price=100.0,
+                timestamp=1234567890, status="filled", profit_loss=pnl
+            ))
+
+        import statistics
+        expected = 0.7 * 0.02 + 0.3 * statistics.stdev(p / 100.0 for p in pnls)
+        self.assertAlmostEqual(self.risk_manager._calculate_recent_volatility(), expected)
+
+    def test_historical_data_round_trip(self):
+        """Test metrics are saved as binary and migrated from legacy JSON."""
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chdir(temp_dir)
+            try:
+                with open('trading_history.json', 'w') as f:
+                    json.dump({'metrics': {'total_pnl': 12.5, 'total_trades': 4, 'winning_trades': 3}}, f)
+
+                migrated = RiskManager(self.config)
+                self.assertEqual(migrated.risk_metrics.total_trades, 4)
+                self.assertTrue(os.path.exists('trading_history.bin'))
+
+                os.remove('trading_history.json')
+                migrated.risk_metrics.win_rate = 0.75
+                migrated._save_historical_data()
+
+                loaded = RiskManager(self.config)
+                self.assertEqual(loaded.risk_metrics, migrated.risk_metrics)
+            finally:
+                os.chdir(cwd)
+
+    def test_grid_level_cache(self):
+        """Test base grid levels are cached per price and trade count."""
+        buy_prices, sell_prices = self.risk_manager.get_optimal_grid_levels(100.0)
+        buy_prices[0] = 0.0  # Mutating a result must not affect cached levels
+        
+        cached_buy, cached_sell = self.risk_manager.get_optimal_grid_levels(100.0)
+        self.assertGreater(cached_buy[0], 0.0)
+        self.assertEqual(cached_sell, sell_prices)
+        
+        # A different price computes fresh levels
+        other_buy, _ = self.risk_manager.get_optimal_grid_levels(200.0)
+        self.assertGreater(other_buy[0], cached_buy[0])
     
     def test_grid_level_calculation(self):
         """Test optimal grid level calculation."""
@@ -182,7 +307,7 @@ class TestAPIClient(unittest.TestCase):
         """Test market price fetching."""
         # Mock successful response
         mock_response = Mock()
-        mock_response.json.return_value = {"price": "100.50"}
+        mock_response.content = b'{"price": "100.50"}'
         mock_response.raise_for_status.return_value = None
         
         mock_session_instance = Mock()
@@ -199,7 +324,7 @@ class TestAPIClient(unittest.TestCase):
         """Test order placement."""
         # Mock successful response
         mock_response = Mock()
-        mock_response.json.return_value = {"id": "test_order_id", "status": "open"}
+        mock_response.content = b'{"id": "test_order_id", "status": "open"}'
         mock_response.raise_for_status.return_value = None
         
         mock_session_instance = Mock()
@@ -212,6 +337,27 @@ class TestAPIClient(unittest.TestCase):
                 "SOL/USDC", "buy", "limit", 1.0, 100.0
             )
             self.assertEqual(order["id"], "test_order_id")
+    
+    def test_cancel_orders_batch(self):
+        """Test batch cancellation reports each order's result."""
+        with patch.object(self.api_client, 'cancel_order', side_effect=lambda order_id: order_id != "b"):
+            results = self.api_client.cancel_orders_batch(["a", "b", "c"])
+        
+        self.assertEqual(results, {"a": True, "b": False, "c": True})
+        self.assertEqual(self.api_client.cancel_orders_batch([]), {})
+    
+    def test_get_orders_by_ids(self):
+        """Test bulk order lookup skips orders that could not be fetched."""
+        def fake_status(order_id):
+            if order_id == "b":
+                raise Exception("not found")
+            return {"id": order_id, "status": "filled"}
+        
+        with patch.object(self.api_client, 'get_order_status', side_effect=fake_status):
+            orders = self.api_client.get_orders_by_ids(["a", "b", "c"])
+        
+        self.assertEqual([order["id"] for order in orders], ["a", "c"])
+        self.assertEqual(self.api_client.get_orders_by_ids([]), [])
 
 class TestGridTradingBot(unittest.TestCase):
     """Test grid trading bot functionality."""
@@ -249,6 +395,116 @@ class TestGridTradingBot(unittest.TestCase):
         self.assertEqual(level.sell_price, 105.0)
         self.assertFalse(level.buy_filled)
         self.assertFalse(level.sell_filled)
+    
+    def test_price_cache(self):
+        """Test that market price lookups are reused within the TTL."""
+        with patch.object(self.bot.api_client, 'get_market_price', return_value=100.0) as mock_price:
+            self.assertEqual(self.bot._price(), 100.0)
+            self.assertEqual(self.bot._price(), 100.0)
+            self.assertEqual(mock_price.call_count, 1)
+            
+            # An expired entry triggers a fresh lookup
+            self.bot._price_cache = (time.monotonic() - self.config.PRICE_CACHE_TTL - 1, 100.0)
+            self.bot._price()
+            self.assertEqual(mock_price.call_count, 2)
+    
+    def test_filled_order_dispatch(self):
+        """Test that a filled buy order re-arms its level with a sell order."""
+        level = GridLevel(level=1, buy_price=95.0, sell_price=105.0)
+        self.bot.grid_levels = [level]
+        
+        with patch.object(self.bot.api_client, 'place_order', return_value={"id": "sell_1"}):
+            self.bot._record_grid_order(level, "buy", {"id": "buy_1"}, 1.0, 95.0)
+            self.bot._handle_filled_order({"id": "buy_1", "side": "buy", "quantity": "1.0", "price": "95.0"})
+            self.assertIsNone(level.sell_order_id)
+            self.bot._place_followup_orders()
+        
+        self.assertTrue(level.buy_filled)
+        self.assertIsNone(level.buy_order_id)
+        self.assertEqual(level.sell_order_id, "sell_1")
+        self.assertNotIn("buy_1", self.bot.active_orders)
+        self.assertEqual(self.bot._order_index["sell_1"], (level, "sell"))
+        self.assertEqual(self.bot._pending_followups, [])
+    
+    def test_cancelled_order_is_forgotten(self):
+        """Test that an order closed by the exchange stops being tracked."""
+        level = GridLevel(level=1, buy_price=95.0, sell_price=105.0)
+        self.bot._record_grid_order(level, "buy", {"id": "buy_1"}, 1.0, 95.0)
+        
+        self.bot._on_order_update({"id": "buy_1", "status": "expired"})
+        
+        self.assertNotIn("buy_1", self.bot.active_orders)
+        self.assertNotIn("buy_1", self.bot._order_index)
+        self.assertIsNone(level.buy_order_id)
+        self.assertFalse(level.buy_filled)
+    
+    def test_update_grid_levels_resets_filled_levels(self):
+        """Test that only levels with both sides filled are re-priced."""
+        filled = GridLevel(level=1, buy_price=95.0, sell_price=105.0, buy_filled=True, sell_filled=True)
+        partial = GridLevel(level=2, buy_price=90.0, sell_price=110.0, buy_filled=True)
+        self.bot.grid_levels = [filled, partial]
+        
+        with patch.object(self.bot.risk_manager, 'get_optimal_grid_levels',
+                          return_value=([198.0, 196.0], [202.0, 204.0])) as mock_levels:
+            self.bot._update_grid_levels(200.0)
+            mock_levels.assert_called_once_with(200.0)
+        
+        self.assertEqual((filled.buy_price, filled.sell_price), (198.0, 202.0))
+        self.assertFalse(filled.buy_filled or filled.sell_filled)
+        self.assertEqual((partial.buy_price, partial.sell_price), (90.0, 110.0))
+        self.assertTrue(partial.buy_filled)
+
+    def test_stop_wakes_event_loop(self):
+        """Test that stop() from another thread ends the loop without waiting out CHECK_INTERVAL."""
+        import asyncio
+        import threading
+
+        self.bot.is_running = True
+        with patch.object(self.bot, '_price', return_value=100.0), \
+             patch.object(self.bot, 'manage_positions'), \
+             patch.object(self.bot.risk_manager, 'should_continue_trading', return_value=True):
+            threading.Timer(0.2, self.bot.stop).start()
+            started = time.monotonic()
+            asyncio.run(self.bot._run_event_loop())
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(self.bot.is_running)
+        self.assertIsNone(self.bot._loop)
+
+    def test_stop_before_run_prevents_trading(self):
+        """Test that a stop requested during startup keeps run() from trading."""
+        self.bot.stop()
+        with patch.object(self.bot, 'place_grid_orders') as mock_place:
+            self.bot.run()
+            mock_place.assert_not_called()
+        self.assertFalse(self.bot.is_running)
+
+class TestNetworkSwitch(unittest.TestCase):
+    """Test .env updates made by the network switcher."""
+    
+    def test_batch_set_env(self):
+        """Test keys are rewritten in place, including indented and export lines."""
+        from dotenv import dotenv_values
+        from network_switch import _batch_set_env
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            env_file = os.path.join(temp_dir, '.env')
+            with open(env_file, 'w') as f:
+                f.write("# comment\nNETWORK=mainnet\n  CAPITAL=5\nexport RPC_URL=old\nOTHER=keep")
+            
+            _batch_set_env(env_file, {'NETWORK': 'devnet', 'CAPITAL': '250', 'RPC_URL': 'new', 'ADDED': "it's"})
+            
+            with open(env_file) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines, [
+                "# comment", "NETWORK='devnet'", "  CAPITAL='250'", "export RPC_URL='new'",
+                "OTHER=keep", "ADDED='it\\'s'",
+            ])
+            self.assertEqual(dotenv_values(env_file), {
+                'NETWORK': 'devnet', 'CAPITAL': '250', 'RPC_URL': 'new', 'OTHER': 'keep', 'ADDED': "it's",
+            })
+            # The temporary file was swapped in, not left beside the .env
+            self.assertEqual(os.listdir(temp_dir), ['.env'])
 
 def run_tests():
     """Run all tests."""
@@ -264,6 +520,7 @@ def run_tests():
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestRiskManager))
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestAPIClient))
     test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestGridTradingBot))
+    test_suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestNetworkSwitch))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
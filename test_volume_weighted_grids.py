@@ -11,7 +11,7 @@ import json
 from unittest.mock import Mock, patch, MagicMock
 from typing import Dict, List
 
-from market_analysis import MarketAnalyzer, VolumeLevel, MarketDepthAnalysis
+from market_analysis import ANALYSIS_CACHE_SIZE, MarketAnalyzer, VolumeLevel, MarketDepthAnalysis
 from risk_manager import RiskManager
 from api_client import APIClient
 from config import Config
@@ -270,6 +270,33 @@ class TestMarketAnalyzer(unittest.TestCase):
         analysis2 = self.analyzer.analyze_market_depth(order_book, self.current_price)
         
         self.assertEqual(analysis1.timestamp, analysis2.timestamp)
+        
+    def test_cache_is_bounded(self):
+        """Test the analysis cache evicts its oldest entries and tracks book changes."""
+        order_book = {
+            'bids': [[99.5, 1000.0]],
+            'asks': [[100.5, 1000.0]]
+        }
+        
+        first = self.analyzer.analyze_market_depth(order_book, self.current_price)
+        changed = self.analyzer.analyze_market_depth(
+            {'bids': [[99.6, 1000.0]], 'asks': [[100.5, 1000.0]]}, self.current_price
+        )
+        self.assertIsNot(first, changed)
+        
+        # An interior level change must not be served from the cache
+        book = {'bids': [[99.8, 10.0], [99.5, 10.0], [99.0, 10.0]],
+                'asks': [[100.2, 10.0], [100.5, 10.0], [101.0, 10.0]]}
+        before = self.analyzer.analyze_market_depth(book, self.current_price)
+        wall = {'bids': [[99.8, 10.0], [99.5, 5000.0], [99.0, 10.0]], 'asks': book['asks']}
+        after = self.analyzer.analyze_market_depth(wall, self.current_price)
+        self.assertIsNot(before, after)
+        self.assertEqual(max(level.volume for level in after.bid_levels), 5000.0)
+        
+        for i in range(ANALYSIS_CACHE_SIZE + 5):
+            self.analyzer.analyze_market_depth(order_book, self.current_price + i * 0.001)
+            
+        self.assertEqual(len(self.analyzer._cache), ANALYSIS_CACHE_SIZE)
 
 
 class TestRiskManagerIntegration(unittest.TestCase):
@@ -1,10 +1,32 @@
+import asyncio
+import binascii
+import json
 import logging
 import os
+import sys
 from datetime import datetime
 from typing import Dict
 from colorama import init, Fore, Back, Style
 from tabulate import tabulate
 
+try:
+    import orjson
+except ImportError:  # Optional dependency, fall back to the stdlib json module
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:  # Optional dependency, fall back to binascii
+    pybase64 = None
+
+try:
+    import uvloop
+except ImportError:  # Optional dependency, fall back to the default asyncio loop
+    uvloop = None
+
+# dataclass(slots=True) is only available on Python 3.10+; older versions get regular dataclasses
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 # Initialize colorama for cross-platform colored output
 init(autoreset=True)
 
@@ -156,6 +178,30 @@ def display_config_summary(config: Dict) -> None:
     print(tabulate(config_data, headers=["Setting", "Value"], tablefmt="grid"))
     print()
 
+def json_dumps(obj) -> bytes:
+    """Serialize an object to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def json_loads(data):
+    """Parse JSON from bytes or str, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def b64decode(data):
+    """Decode base64 (e.g. a serialized transaction), using pybase64's SIMD decoder when available."""
+    if pybase64 is not None:
+        return pybase64.b64decode(data, validate=False)
+    return binascii.a2b_base64(data)
+
+def run_async(coro):
+    """Run a coroutine to completion, on uvloop's libuv event loop when available."""
+    if uvloop is not None:
+        uvloop.install()
+    return asyncio.run(coro)
+
 def format_currency(amount: float) -> str:
     """Format currency amount with proper formatting."""
     if amount >= 1000000: